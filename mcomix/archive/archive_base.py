@@ -13,6 +13,10 @@ from mcomix import process
 from mcomix import callback
 from mcomix.archive import password as archive_password
 
+# Maps characters that cannot be used in filenames to an underscore.
+_INVALID_FILESYSTEM_CHARS_TABLE = str.maketrans(
+    dict.fromkeys(portability.invalid_filesystem_chars(), '_'))
+
 
 class BaseArchive(object):
     """ Base archive interface. All filenames passed from and into archives
@@ -82,13 +86,7 @@ class BaseArchive(object):
         """ Replaces characters in <filename> that cannot be saved to the disk
         with underscore and returns the cleaned-up name. """
 
-        unsafe_chars = portability.invalid_filesystem_chars()
-        translation_table = {}
-        replacement_char = '_'
-        for char in unsafe_chars:
-            translation_table[ord(char)] = replacement_char
-
-        new_name = filename.translate(translation_table)
+        new_name = filename.translate(_INVALID_FILESYSTEM_CHARS_TABLE)
 
         # Make sure the filename does not contain portions that might
         # traverse directories, i.e. do not allow absolute paths
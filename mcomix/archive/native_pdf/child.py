@@ -18,31 +18,47 @@ XREF_DELIMITER = '_mcmxref'
 
 class FitzWorker:
     def __init__(self, filename: Optional[str], log_level: Optional[int] = None) -> None:
-        self._extension: Optional[str] = None
         self._complex_doc = False
         self.log = mp.get_logger()
         if log_level is not None:
             self.log.setLevel(log_level)
         self.doc = fitz.open(filename)
+        self._extension = self._check_image_type(self._first_image_xref())
+        # Pages of comic PDFs usually all share the same size, so the
+        # first page's rectangle is kept for comparison.
+        self._ref_mediabox: Optional[tuple] = None
+        if self.doc.page_count > 0:
+            mediabox = self.doc[0].mediabox
+            self._ref_mediabox = tuple(mediabox)
+            self._ref_page_rect = fitz.Rect(mediabox).irect
+            self._ref_page_area = self._ref_page_rect.get_area()
 
     def page_count(self) -> int:
         return self.doc.page_count
 
-    def _image_extension(self, page_num: int) -> str:
-        """Return the filename extension for the page image."""
-        if self._extension is None:
-            self._extension = self._check_image_type(page_num)
-        return self._extension
+    def _first_image_xref(self) -> int:
+        """Return the xref of the first page's first image, or -1."""
+        try:
+            return int(self.doc.get_page_images(0)[0][0])
+        except (TypeError, IndexError, ValueError):
+            return -1
 
-    def _extract_as_image(self, page_num: int) -> bool:
-        """Check whether the page can be extracted via image export."""
+    def _extract_as_image(self, page_num: int) -> Optional[int]:
+        """Check whether the page can be extracted via image export.
+
+        Returns the xref of the page's image if so, None otherwise.
+        The page and its image list are only looked up once, and shared
+        by the checks below.
+        """
         if self._complex_doc:
-            return False
-        if not self._must_render_page(page_num) and self._can_extract_image(page_num):
-            return True
-        return False
+            return None
+        page = self.doc[page_num]
+        images = page.get_images()
+        if not self._must_render_page(page, images) and self._can_extract_image(page):
+            return int(images[0][0])
+        return None
 
-    def _must_render_page(self, page_num: int) -> bool:
+    def _must_render_page(self, page: fitz.Page, images: list) -> bool:
         """Determine if a page has any forced-render markers.
 
         Rendering to pixmap must be forced if any of these apply:
@@ -50,30 +66,32 @@ class FitzWorker:
             - The page has any drawing content
             - The page contains 0, or more than 1, embedded image
         """
-        page = self.doc[page_num]
-        if len(page.get_images()) != 1 or len(page.get_text()) > 0:
+        # The cheap image count check comes first, as it often decides
+        # the page on its own. Text blocks (with image blocks excluded
+        # via flags=0) are enough to detect text, without assembling
+        # the page's whole text into a string.
+        if len(images) != 1 or len(page.get_text('blocks', flags=0)) > 0:
             self._complex_doc = True
             result = True
-            self.log.debug("PDF page %d, must render page", page_num + 1)
+            self.log.debug("PDF page %d, must render page", page.number + 1)
         else:
             result = False
-            self.log.debug("PDF page %d, rendering not forced", page_num + 1)
-        del page
+            self.log.debug("PDF page %d, rendering not forced", page.number + 1)
         return result
 
-    def _can_extract_image(self, page_num: int) -> bool:
+    def _can_extract_image(self, page: fitz.Page) -> bool:
         """Determine if a page has an extractable image.
 
         Makes a closer examination than _must_render_page(),
         by checking whether the page contains a single, full-page
-        image, then actually extracting the first such image
-        encountered to determine the filetype (extension).
+        image.
 
-        (Subsequent embedded images are assumed to have the same
-        type as the first full-page image encountered. This may
-        be somewhat fragile, but it's a huge performance boost.)
+        (All embedded images are assumed to have the same type as
+        the image probed on the first page when the document was
+        opened. This may be somewhat fragile, but it's a huge
+        performance boost.)
         """
-        page = self.doc[page_num]
+        page_num = page.number
         image_info = page.get_image_info()
         if len(image_info) != 1:
             self.log.debug(
@@ -82,8 +100,13 @@ class FitzWorker:
             return False
         info = image_info[0]
         img_rect = fitz.Rect(info.get('bbox', (0, 0, 0, 0))).irect
-        page_rect = fitz.Rect(page.mediabox).irect
-        page_area = page_rect.get_area()
+        mediabox = page.mediabox
+        if tuple(mediabox) == self._ref_mediabox:
+            page_rect = self._ref_page_rect
+            page_area = self._ref_page_area
+        else:
+            page_rect = fitz.Rect(mediabox).irect
+            page_area = page_rect.get_area()
         area_diff = abs(page_area - img_rect.get_area())
         is_full_page: bool = area_diff < 0.05 * page_area
         if is_full_page:
@@ -92,11 +115,9 @@ class FitzWorker:
             self.log.debug(
                 'PDF page %d, cannot extract image: %s',
                 page_num + 1, f"img_rect={img_rect}, page_rect={page_rect}")
-        del page
-        del image_info
         return is_full_page
 
-    def _check_image_type(self, page_num: int) -> str:
+    def _check_image_type(self, xref: int) -> str:
         """Examine the page's embedded image for its file type.
 
         The extension is determined heuristically by probing only the
@@ -112,7 +133,6 @@ class FitzWorker:
         """
         extension = 'png'
         try:
-            xref = self._get_image_xref(page_num)
             img = fitz.image_profile(
                 self.doc.xref_stream_raw(xref))
             # If image_profile returns an empty dict, the image type is
@@ -123,29 +143,17 @@ class FitzWorker:
             # extraction without converting, but still very fast.
             if img:
                 extension = img.get('ext', 'png')
-                del img
         except (AttributeError, TypeError):
             pass
         finally:
             return extension
 
-    def _get_image_xref(self, page_num: int) -> int:
-        try:
-            image_info = self.doc.get_page_images(page_num)
-            xref = int(image_info[0][0])
-            return xref
-        except (TypeError, IndexError):
-            return -1
-        finally:
-            image_info = None
-
     def iter_contents(self) -> Generator[str, None, None]:
         for pg in range(self.doc.page_count):
             pagenum = f"page{pg + 1:04}"
-            if self._extract_as_image(pg):
-                xref = self._get_image_xref(pg)
-                ext = self._image_extension(pg)
-                filename = f"{pagenum}{XREF_DELIMITER}{xref:04}.{ext}"
+            xref = self._extract_as_image(pg)
+            if xref is not None:
+                filename = f"{pagenum}{XREF_DELIMITER}{xref:04}.{self._extension}"
             else:
                 filename = f"{pagenum}.png"
             yield filename
@@ -157,7 +165,6 @@ class FitzWorker:
             return
         os.makedirs(os.path.dirname(path), exist_ok=True)
         img_bytes = img.get("image", b"")
-        del img
 
         # The extract_image method always returns the unrotated version of the image,
         # unaffected by any page modifications of rotation.
@@ -176,17 +183,21 @@ class FitzWorker:
         else:
             with open(path, "wb") as out:
                 out.write(img_bytes)
-        del img_bytes
 
     def render_page(self, pg: int, path: str) -> None:
         """Render the page to an image file and save."""
         page = self.doc[pg]
-        pixmap = page.get_pixmap(dpi=PDF_RENDER_DPI_DEF)
-        pixmap.save(path)
-        del pixmap
-        del page
+        pixmap = page.get_pixmap(
+            dpi=PDF_RENDER_DPI_DEF, alpha=False, colorspace=fitz.csRGB)
+        # These files are only temporary, so trade some size for speed
+        # and use the fastest zlib level instead of the default of 6.
+        # (An uncompressed format such as PPM would be cheaper still to
+        # write, but every page of the document ends up in the temporary
+        # directory, at about 24 MB per A4 page at the default DPI.)
+        pixmap.pil_save(path, format='PNG', optimize=False, compress_level=1)
 
     def extract_file(self, filename: str, dest: str) -> None:
+        """Extract or render the page file <filename> to <dest>."""
         outpath = os.path.join(dest, filename)
         if XREF_DELIMITER in filename:
             pginfo, ref = filename.split(XREF_DELIMITER)
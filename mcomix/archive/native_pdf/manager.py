@@ -3,95 +3,167 @@ of PDF extractor."""
 
 import sys
 import threading
+import weakref
 import multiprocessing as mp
-from multiprocessing.managers import BaseManager, BaseProxy
+from multiprocessing.connection import Connection
 
-from typing import Optional, Generator
+from typing import Any, Generator, Iterator, List, Optional
 
 from .child import FitzWorker
 
+# Maximum number of pages extracted per request to the worker process.
+EXTRACT_REQUEST_BATCH = 16
 
-class GeneratorProxy(BaseProxy):
-    """Proxy type for generator objects."""
 
-    _exposed_ = ['__next__']
+def worker_main(conn: Connection, filename: str, log_level: Optional[int]) -> None:
+    """Entry point of the worker process.
 
-    def __iter__(self):
-        return self
-
-    def __next__(self):
-        return self._callmethod('__next__')
-
-
-class WorkerProxy(BaseProxy):
-    """Proxy type for FitzWorker methods.
-
-    This code will run in the child processes, when triggered by
-    the registered methods of the Manager.
+    Opens the document once, then answers (command, *args) requests
+    received over <conn> with ('ok', result) or ('error', exception)
+    replies, until the 'close' command or the end of the connection.
+    'extract_pages' first sends an ('item', filename) reply for each
+    page as soon as it is extracted.
     """
-
-    filename: Optional[str] = None
-
-    @classmethod
-    def _open(cls, filename):
-        cls.filename = filename
-
-    @classmethod
-    def _count_pages(cls) -> int:
-        w = FitzWorker(cls.filename)
-        return w.page_count()
-
-    @classmethod
-    def _list_pages(cls) -> Generator[str, None, None]:
-        w = FitzWorker(cls.filename)
-        return w.iter_contents()
-
-    @classmethod
-    def _extract_pages(cls, entries, save_path: str) -> Generator[str, None, None]:
-        w = FitzWorker(cls.filename)
-        for e in entries:
-            w.extract_file(e, save_path)
-            yield e
-
-
-class FitzManager(BaseManager):
-    """Multiprocessing manager to hold proxied worker callables."""
-
-    pass
-
-
-FitzManager.register('open', WorkerProxy._open)
-FitzManager.register('page_count', WorkerProxy._count_pages)
-FitzManager.register('iter_contents', WorkerProxy._list_pages, proxytype=GeneratorProxy)
-FitzManager.register('extract_pages', WorkerProxy._extract_pages, proxytype=GeneratorProxy)
-
-
-class FitzProcessWrangler(threading.local):
-    """Thread-local state object holding a FitzManager instance.
+    worker = FitzWorker(filename, log_level)
+    while True:
+        try:
+            cmd, *args = conn.recv()
+        except EOFError:
+            break
+        if cmd == 'close':
+            break
+        try:
+            if cmd == 'page_count':
+                result: Any = worker.page_count()
+            elif cmd == 'iter_contents':
+                # Sent as a list, in a single message.
+                result = list(worker.iter_contents())
+            elif cmd == 'extract_pages':
+                entries, save_path = args
+                for e in entries:
+                    worker.extract_file(e, save_path)
+                    conn.send(('item', e))
+                result = None
+            else:
+                raise ValueError(f"unknown command: {cmd}")
+        except Exception as ex:
+            conn.send(('error', ex))
+        else:
+            conn.send(('ok', result))
+    conn.close()
+
+
+def _stop_worker(conn: Connection) -> None:
+    """Ask the worker process on the other end of <conn> to exit."""
+    try:
+        conn.send(('close',))
+    except (OSError, ValueError):
+        # Worker is already gone.
+        pass
+    conn.close()
+
+
+class FitzWorkerProcess:
+    """A child process holding a FitzWorker, driven through a pipe."""
+
+    def __init__(self, filename: str, log_level: Optional[int]) -> None:
+        self._conn, child_conn = mp.Pipe()
+        self._process = mp.Process(
+            target=worker_main, args=(child_conn, filename, log_level),
+            name='FitzWorker', daemon=True)
+        self._process.start()
+        child_conn.close()
+        # The worker process exits once this object is collected.
+        self._finalizer = weakref.finalize(self, _stop_worker, self._conn)
+
+    def call(self, cmd: str, *args: Any) -> Any:
+        """Send a command to the worker process and return its result."""
+        self._conn.send((cmd,) + args)
+        status, result = self._conn.recv()
+        if status == 'error':
+            raise result
+        return result
+
+    def stream(self, cmd: str, *args: Any) -> Generator[Any, None, None]:
+        """Send a command to the worker process and yield the items it
+        replies with, until its final reply."""
+        self._conn.send((cmd,) + args)
+        try:
+            while True:
+                status, result = self._conn.recv()
+                if status == 'item':
+                    yield result
+                elif status == 'error':
+                    raise result
+                else:
+                    return
+        except GeneratorExit:
+            # Stopped early: skip the remaining replies to this command,
+            # so that they are not taken for replies to the next one.
+            while self._conn.recv()[0] == 'item':
+                pass
+            raise
+
+    def close(self) -> None:
+        """Stop the worker process."""
+        self._finalizer()
+
+
+class FitzProcessWrangler:
+    """State object holding a FitzWorkerProcess instance per thread.
 
     This is necessary so that each Mcomix extractor thread has its own
-    FitzManager instance (and, therefore, its own worker process).
+    worker process (and its own pipe to it).
     """
 
     def __init__(self, filename, log_level):
-        self.mgr = FitzManager()
-        self.mgr.start()
-        self.mgr.open(filename)
+        self._filename = filename
+        self._log_level = log_level
+        self._local = threading.local()
+        # All the worker processes started, whichever thread uses them.
+        self._procs: List[FitzWorkerProcess] = []
+        self._procs_lock = threading.Lock()
         self.log = mp.get_logger()
         if log_level is not None:
             self.log.setLevel(log_level)
 
+    @property
+    def proc(self) -> FitzWorkerProcess:
+        """The worker process of the calling thread, started on first use."""
+        proc = getattr(self._local, 'proc', None)
+        if proc is None:
+            proc = FitzWorkerProcess(self._filename, self._log_level)
+            self._local.proc = proc
+            with self._procs_lock:
+                self._procs.append(proc)
+        return proc
+
+    def close(self) -> None:
+        """Stop the worker processes, releasing the document they hold."""
+        with self._procs_lock:
+            procs, self._procs = self._procs, []
+        for proc in procs:
+            proc.close()
+        self._local = threading.local()
+
     def page_count(self) -> int:
         """Get the number of pages in the PDF."""
-        return self.mgr.page_count()
+        return self.proc.call('page_count')
 
-    def iter_contents(self) -> Generator[str, None, None]:
+    def iter_contents(self) -> Iterator[str]:
         """Return an iterator over all the page filenames in the PDF."""
-        return self.mgr.iter_contents()
+        return iter(self.proc.call('iter_contents'))
 
     def extract_pages(self, page_list, destination_dir) -> Generator[str, None, None]:
-        """Extract the listed pages to the given directory."""
-        return self.mgr.extract_pages(page_list, destination_dir)
+        """Extract the listed pages to the given directory.
+
+        Pages are requested in batches, and each one is reported as soon
+        as it is extracted. A caller stopping early only waits for the
+        rest of the current batch."""
+        page_list = list(page_list)
+        for start in range(0, len(page_list), EXTRACT_REQUEST_BATCH):
+            batch: List[str] = page_list[start:start + EXTRACT_REQUEST_BATCH]
+            yield from self.proc.stream('extract_pages', batch, destination_dir)
 
 
 # Test code, this module can be called directly with one argument (a PDF
@@ -7,7 +7,7 @@ from mcomix.archive import archive_base
 from mcomix.archive.native_pdf.manager import FitzProcessWrangler
 from mcomix.log import getLevel
 
-from typing import Generator, List
+from typing import Generator, Iterator, List
 
 
 class FitzArchive(archive_base.BaseArchive):
@@ -29,7 +29,7 @@ class FitzArchive(archive_base.BaseArchive):
         return True
 
     def _open_doc(self) -> FitzProcessWrangler:
-        """Create a new FitzManager instance for processes accessing the archive."""
+        """Create a new wrangler, holding the worker processes accessing the archive."""
         self.close()
         self._mgr = FitzProcessWrangler(self.archive, log_level=self.log.level)
         return self._mgr
@@ -37,6 +37,7 @@ class FitzArchive(archive_base.BaseArchive):
     def close(self) -> None:
         """Destroy the wrangler object and free resources."""
         if hasattr(self, '_mgr'):
+            self._mgr.close()
             del self._mgr
 
     @property
@@ -45,8 +46,8 @@ class FitzArchive(archive_base.BaseArchive):
             return self._open_doc()
         return self._mgr
 
-    def iter_contents(self) -> Generator[str, None, None]:
-        """Generate page filenames."""
+    def iter_contents(self) -> Iterator[str]:
+        """Return an iterator over the page filenames."""
         return self.mgr.iter_contents()
 
     def extract(self, filename, destination_dir):
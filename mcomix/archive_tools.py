@@ -118,15 +118,16 @@ def get_supported_formats():
     return _SUPPORTED_ARCHIVE_FORMATS
 
 _SUPPORTED_ARCHIVE_FORMATS = None
-# Set supported archive extensions regexp from list of supported formats.
+# Set supported archive extensions from list of supported formats.
 # Only used internally.
-_SUPPORTED_ARCHIVE_REGEX = tools.formats_to_regex(get_supported_formats())
-log.debug("_SUPPORTED_ARCHIVE_REGEX='%s'", _SUPPORTED_ARCHIVE_REGEX.pattern)
+_SUPPORTED_ARCHIVE_EXTENSIONS = tools.formats_to_extset(get_supported_formats())
+log.debug("_SUPPORTED_ARCHIVE_EXTENSIONS=%s", sorted(_SUPPORTED_ARCHIVE_EXTENSIONS))
 
 def is_archive_file(path):
     """Return True if the file at <path> is a supported archive file.
     """
-    return _SUPPORTED_ARCHIVE_REGEX.search(path) is not None
+    _, dot, extension = path.rpartition('.')
+    return bool(dot) and extension.lower() in _SUPPORTED_ARCHIVE_EXTENSIONS
 
 def archive_mime_type(path):
     """Return the archive type of <path> or None for non-archives."""
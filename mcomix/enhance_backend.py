@@ -1,12 +1,19 @@
 """enhance_backend.py - Image enhancement handler and dialog (e.g. contrast,
 brightness etc.)
 """
+import threading
+from collections import OrderedDict
 from gi.repository import GLib
 
 from mcomix.preferences import prefs
 from mcomix import image_tools
 from mcomix.library import main_dialog
 
+# Delay (in ms) before reloading thumbnails after the last change.
+THUMBNAIL_UPDATE_DELAY = 150
+# Number of enhanced pixbufs kept (current, previous and next page + 1).
+ENHANCE_CACHE_SIZE = 4
+
 class ImageEnhancer(object):
 
     """The ImageEnhancer keeps track of the "enhancement" values and performs
@@ -22,18 +29,44 @@ class ImageEnhancer(object):
         self.sharpness = prefs['sharpness']
         self.autocontrast = prefs['auto contrast']
         self.invert_color = prefs['invert color']
+        self._update_event = None
+        # (id(pixbuf), enhancement values) -> (pixbuf, enhanced pixbuf).
+        # The source pixbuf is kept alive so that its id is not reused.
+        self._cache = OrderedDict()
+        # enhance() is also called from the thumbnail worker threads.
+        self._cache_lock = threading.Lock()
 
-    def enhance(self, pixbuf):
-        """Return an "enhanced" version of <pixbuf>."""
+    def enhance(self, pixbuf, cache=False):
+        """Return an "enhanced" version of <pixbuf>. If <cache> is True, the
+        result is kept for later calls with the same pixbuf; this is meant
+        for the main pages only.
+        """
 
         if (self.brightness != 1.0 or self.contrast != 1.0 or
           self.saturation != 1.0 or self.sharpness != 1.0 or
           self.autocontrast or self.invert_color):
 
-            return image_tools.enhance(pixbuf, self.brightness, self.contrast,
+            if cache:
+                key = (id(pixbuf), self.brightness, self.contrast,
+                       self.saturation, self.sharpness, self.autocontrast,
+                       self.invert_color)
+                with self._cache_lock:
+                    entry = self._cache.get(key)
+                    if entry is not None:
+                        self._cache.move_to_end(key)
+                        return entry[1]
+
+            enhanced = image_tools.enhance(pixbuf, self.brightness, self.contrast,
                 self.saturation, self.sharpness, self.autocontrast,
                 self.invert_color)
 
+            if cache:
+                with self._cache_lock:
+                    self._cache[key] = (pixbuf, enhanced)
+                    if len(self._cache) > ENHANCE_CACHE_SIZE:
+                        self._cache.popitem(last=False)
+            return enhanced
+
         return pixbuf
 
     def signal_update(self):
@@ -42,12 +75,28 @@ class ImageEnhancer(object):
         """
         self._window.draw_image()
 
+        # Thumbnails and covers are only reloaded once the values
+        # stop changing, e.g. when the user stops dragging a slider.
+        if self._update_event:
+            GLib.source_remove(self._update_event)
+        self._update_event = GLib.timeout_add(
+            THUMBNAIL_UPDATE_DELAY, self._update_thumbnails)
+
+        self._window.update_icon(False)
+
+    def _update_thumbnails(self):
+        """Reload thumbnails and library covers with the current
+        enhancement values."""
+        self._update_event = None
+        with self._cache_lock:
+            self._cache.clear()
+
         self._window.thumbnailsidebar.clear()
-        GLib.idle_add(self._window.thumbnailsidebar.load_thumbnails)
+        self._window.thumbnailsidebar.load_thumbnails()
 
         if main_dialog._dialog is not None:
             main_dialog._dialog.book_area.load_covers()
 
-        self._window.update_icon(False)
+        return 0 # To unregister gobject timer event
 
 # vim: expandtab:sw=4:ts=4
@@ -218,7 +218,6 @@ class FileHandler(object):
         # Catch up on UI events, so we don't leave idle callbacks.
         while Gtk.events_pending():
             Gtk.main_iteration_do(False)
-        tools.garbage_collect()
         if self._tmp_dir is not None:
             self.thread_delete(self._tmp_dir)
             self._tmp_dir = None
@@ -2,6 +2,7 @@
 
 from gi.repository import Gtk
 import pkgutil
+from concurrent.futures import ThreadPoolExecutor
 
 from mcomix import image_tools
 from mcomix import log
@@ -22,6 +23,16 @@ def mcomix_icons():
     return pixbufs
 
 
+def _load_icon(filename):
+    """ Returns a pixbuf for the icon <filename>, or None if it could
+    not be loaded. Safe to call from worker threads. """
+    try:
+        icon_data = pkgutil.get_data('mcomix', 'images/%s' % filename)
+        return image_tools.load_pixbuf_data(icon_data)
+    except Exception:
+        return None
+
+
 def load_icons() -> None:
     _icons = (('gimp-flip-horizontal.png',   'mcomix-flip-horizontal'),
               ('gimp-flip-vertical.png',     'mcomix-flip-vertical'),
@@ -46,19 +57,22 @@ def load_icons() -> None:
               ('fitmanual.png',              'mcomix-fitmanual'),
               ('fitsize.png',                'mcomix-fitsize'))
 
-    # Load window title icons.
-    pixbufs = mcomix_icons()
-    Gtk.Window.set_default_icon_list(pixbufs)
-    # Load application icons.
-    factory = Gtk.IconFactory()
-    for filename, stockid in _icons:
-        try:
-            icon_data = pkgutil.get_data('mcomix', 'images/%s' % filename)
-            pixbuf = image_tools.load_pixbuf_data(icon_data)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        # Decode application icons in the background (the PNG decoder
+        # releases the GIL), Gtk objects are still created here.
+        icon_pixbufs = executor.map(_load_icon,
+                                    [filename for filename, stockid in _icons])
+        # Load window title icons.
+        pixbufs = mcomix_icons()
+        Gtk.Window.set_default_icon_list(pixbufs)
+        # Load application icons.
+        factory = Gtk.IconFactory()
+        for (filename, stockid), pixbuf in zip(_icons, icon_pixbufs):
+            if pixbuf is None:
+                log.warning(_('! Could not load icon "%s"'), filename)
+                continue
             iconset = Gtk.IconSet(pixbuf)
             factory.add(stockid, iconset)
-        except Exception:
-            log.warning(_('! Could not load icon "%s"'), filename)
     factory.add_default()
 
 
@@ -64,7 +64,6 @@ class ImageHandler(object):
             try:
                 pixbuf = image_tools.load_pixbuf(self._image_files[index])
                 self._raw_pixbufs[index] = pixbuf
-                tools.garbage_collect()
             except Exception as e:
                 self._raw_pixbufs[index] = image_tools.MISSING_IMAGE_ICON
                 log.error('Could not load pixbuf for page %u: %r', index + 1, e)
@@ -93,12 +92,12 @@ class ImageHandler(object):
         pixbufs = self.get_pixbufs(number_of_bufs)
 
         if len(pixbufs) == 1:
-            pixbufs[0] = self._window.enhancer.enhance(pixbufs[0])
+            pixbufs[0] = self._window.enhancer.enhance(pixbufs[0], cache=True)
             auto_bg = image_tools.get_most_common_edge_colour(pixbufs[0])
         elif len(pixbufs) == 2:
             left, right = pixbufs
-            left = self._window.enhancer.enhance(left)
-            right = self._window.enhancer.enhance(right)
+            left = self._window.enhancer.enhance(left, cache=True)
+            right = self._window.enhancer.enhance(right, cache=True)
             if self._window.is_manga_mode:
                 left, right = right, left
 
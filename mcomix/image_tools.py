@@ -1,12 +1,16 @@
 """image_tools.py - Various image manipulations."""
 
-import operator
+import binascii
+import functools
+import os
+import pickle
+
 from gi.repository import GLib, GdkPixbuf, Gdk, Gtk
 import PIL
 from PIL import Image
 from PIL import ImageEnhance
 from PIL import ImageOps
-from io import StringIO
+from io import BytesIO
 
 from mcomix.preferences import prefs
 from mcomix import constants
@@ -72,10 +76,12 @@ def get_fitting_size(source_size, target_size,
         width, height = src_width, src_height
     else:
         if keep_ratio:
-            if float(src_width) / width > float(src_height) / height:
-                height = int(max(src_height * width / src_width, 1))
+            # Same as comparing src_width / width and src_height / height,
+            # but in integer arithmetic.
+            if src_width * height > src_height * width:
+                height = max(src_height * width // src_width, 1)
             else:
-                width = int(max(src_width * height / src_height, 1))
+                width = max(src_width * height // src_height, 1)
     return (width, height)
 
 def fit_pixbuf_to_rectangle(src, rect, rotation):
@@ -123,7 +129,7 @@ def fit_in_rectangle(src, width, height, keep_ratio=True, scale_up=False, rotati
                                      keep_ratio=keep_ratio,
                                      scale_up=scale_up)
 
-    if src.get_has_alpha():
+    if src.get_has_alpha() and not _alpha_is_opaque(src):
         composite_color_args = get_composite_color_args(0
             if prefs['checkered bg for transparent images'] else 1)
         if width == src_width and height == src_height:
@@ -140,131 +146,116 @@ def fit_in_rectangle(src, width, height, keep_ratio=True, scale_up=False, rotati
     return src
 
 
+def _alpha_is_opaque(pixbuf):
+    """Return True if the alpha channel of <pixbuf> is fully opaque, in
+    which case there is no need to composite it. The result is cached on
+    the pixbuf, as it is checked again on each redraw."""
+    opaque = getattr(pixbuf, 'alpha_is_opaque', None)
+    if opaque is None:
+        opaque = _scan_alpha_opaque(pixbuf.get_pixels(), pixbuf.get_width(),
+                                    pixbuf.get_height(), pixbuf.get_rowstride())
+        setattr(pixbuf, 'alpha_is_opaque', opaque)
+    return opaque
+
+
+def _scan_alpha_opaque(pixels, width, height, rowstride):
+    """Return True if every alpha byte of the RGBA <pixels> is 255,
+    stopping at the first row that has a translucent pixel."""
+    opaque_row = b'\xff' * width
+    for start in range(3, height * rowstride, rowstride):
+        if pixels[start:start + 4 * width:4] != opaque_row:
+            return False
+    return True
+
+
 def add_border(pixbuf, thickness, colour=0x000000FF):
     """Return a pixbuf from <pixbuf> with a <thickness> px border of
     <colour> added.
     """
+    width = pixbuf.get_width()
+    height = pixbuf.get_height()
     canvas = GdkPixbuf.Pixbuf.new(GdkPixbuf.Colorspace.RGB, True, 8,
-        pixbuf.get_width() + thickness * 2,
-        pixbuf.get_height() + thickness * 2)
-    canvas.fill(colour)
-    pixbuf.copy_area(0, 0, pixbuf.get_width(), pixbuf.get_height(),
-        canvas, thickness, thickness)
+        width + thickness * 2, height + thickness * 2)
+    pixbuf.copy_area(0, 0, width, height, canvas, thickness, thickness)
+    if thickness > 0:
+        # Only fill the border itself (top, bottom, left, right), the
+        # rest of the canvas is covered by <pixbuf>.
+        for x, y, w, h in ((0, 0, width + thickness * 2, thickness),
+                           (0, height + thickness, width + thickness * 2, thickness),
+                           (0, thickness, thickness, height),
+                           (width + thickness, thickness, thickness, height)):
+            canvas.new_subpixbuf(x, y, w, h).fill(colour)
     return canvas
 
 
+def _color_group_table(steps):
+    """ Returns a lookup table for Image.point, rounding color values to
+    the nearest multiple of C{steps}, i.e. 128, 83, 10 becomes 130, 85, 10
+    with C{steps}=5. This compensates for dirty colors where no clear
+    dominating color can be made out. """
+    if steps % 2 == 0:
+        middle = steps // 2
+    else:
+        middle = steps // 2 + 1
+    table = []
+    for color_value in range(256):
+        remainder = color_value % steps
+        if remainder >= middle:
+            color_value = color_value + (steps - remainder)
+        else:
+            color_value = color_value - remainder
+        table.append(min(255, max(0, color_value)))
+    return table
+
+_EDGE_COLOR_GROUPS = _color_group_table(10)
+
 def get_most_common_edge_colour(pixbufs, edge=2):
-    """Return the most commonly occurring pixel value along the four edges
-    of <pixbuf>. The return value is a sequence, (r, g, b), with 16 bit
-    values. If <pixbuf> is a tuple, the edges will be computed from
-    both the left and the right image.
+    """Return the most commonly occurring pixel value along the left and
+    right edges of <pixbuf>. The return value is a sequence, (r, g, b),
+    with 16 bit values. If <pixbuf> is a tuple, the edges will be computed
+    from both the left and the right image.
+
+    Colors are first rounded into groups of similar colors, the result is
+    the color that appears most often in the most prominent group.
 
     Note: This could be done more cleanly with subpixbuf(), but that
     doesn't work as expected together with get_pixels().
     """
 
-    def group_colors(colors, steps=10):
-        """ This rounds a list of colors in C{colors} to the next nearest value,
-        i.e. 128, 83, 10 becomes 130, 85, 10 with C{steps}=5. This compensates for
-        dirty colors where no clear dominating color can be made out.
-
-        @return: The color that appears most often in the prominent group."""
-
-        # Start group
-        group = (0, 0, 0)
-        # List of (count, color) pairs, group contains most colors
-        colors_in_prominent_group = []
-        color_count_in_prominent_group = 0
-        # List of (count, color) pairs, current color group
-        colors_in_group = []
-        color_count_in_group = 0
-
-        for count, color in colors:
-
-            # Round color
-            rounded = [0] * len(color)
-            for i, color_value in enumerate(color):
-                if steps % 2 == 0:
-                    middle = steps // 2
-                else:
-                    middle = steps // 2 + 1
-
-                remainder = color_value % steps
-                if remainder >= middle:
-                    color_value = color_value + (steps - remainder)
-                else:
-                    color_value = color_value - remainder
-
-                rounded[i] = min(255, max(0, color_value))
-
-            # Change prominent group if necessary
-            if rounded == group:
-                # Color still fits in the previous color group
-                colors_in_group.append((count, color))
-                color_count_in_group += count
-            else:
-                # Color group changed, check if current group has more colors
-                # than last group
-                if color_count_in_group > color_count_in_prominent_group:
-                    colors_in_prominent_group = colors_in_group
-                    color_count_in_prominent_group = color_count_in_group
-
-                group = rounded
-                colors_in_group = [ (count, color) ]
-                color_count_in_group = count
-
-        # Cleanup if only one edge color group was found
-        if color_count_in_group > color_count_in_prominent_group:
-            colors_in_prominent_group = colors_in_group
-
-        colors_in_prominent_group.sort(key=operator.itemgetter(0), reverse=True)
-        # List is now sorted by color count, first color appears most often
-        return colors_in_prominent_group[0][1]
-
-    def get_edge_pixbuf(pixbuf, side, edge):
-        """ Returns a pixbuf corresponding to the side passed in <side>.
-        Valid sides are 'left', 'right', 'top', 'bottom'. """
-        pixbuf = static_image(pixbuf)
-        width = pixbuf.get_width()
-        height = pixbuf.get_height()
-        edge = min(edge, width, height)
-
-        subpix = GdkPixbuf.Pixbuf.new(GdkPixbuf.Colorspace.RGB,
-                pixbuf.get_has_alpha(), 8, edge, height)
-        if side == 'left':
-            pixbuf.copy_area(0, 0, edge, height, subpix, 0, 0)
-        elif side == 'right':
-            pixbuf.copy_area(width - edge, 0, edge, height, subpix, 0, 0)
-        elif side == 'top':
-            pixbuf.copy_area(0, 0, width, edge, subpix, 0, 0)
-        elif side == 'bottom':
-            pixbuf.copy_area(0, height - edge, width, edge, subpix, 0, 0)
-        else:
-            assert False, 'Invalid edge side'
-
-        return subpix
-
     if not pixbufs:
         return (0, 0, 0)
 
     if not isinstance(pixbufs, (tuple, list)):
-        left_edge = get_edge_pixbuf(pixbufs, 'left', edge)
-        right_edge = get_edge_pixbuf(pixbufs, 'right', edge)
+        left = right = static_image(pixbufs)
     else:
         assert len(pixbufs) == 2, 'Expected two pages in list'
-        left_edge = get_edge_pixbuf(pixbufs[0], 'left', edge)
-        right_edge = get_edge_pixbuf(pixbufs[1], 'right', edge)
-
-    # Find all edge colors. Color count is separate for all four edges
-    ungrouped_colors = []
-    for edge in (left_edge, right_edge):
-        im = pixbuf_to_pil(edge)
-        ungrouped_colors.extend(im.getcolors(im.size[0] * im.size[1]))
-
-    # Sum up colors from all edges
-    ungrouped_colors.sort(key=operator.itemgetter(1))
-    most_used = group_colors(ungrouped_colors)[:3]
-    return [color * 257 for color in most_used]
+        left = static_image(pixbufs[0])
+        right = static_image(pixbufs[1])
+
+    # Both edge strips are copied below each other into a single pixbuf,
+    # so that colors are converted and counted in one go.
+    edge = min(edge, left.get_width(), left.get_height(),
+               right.get_width(), right.get_height())
+    edges = GdkPixbuf.Pixbuf.new(GdkPixbuf.Colorspace.RGB,
+            left.get_has_alpha() or right.get_has_alpha(), 8,
+            edge, left.get_height() + right.get_height())
+    left.copy_area(0, 0, edge, left.get_height(), edges, 0, 0)
+    right.copy_area(right.get_width() - edge, 0, edge, right.get_height(),
+                    edges, 0, left.get_height())
+
+    # Count edge colors and color groups. Both rounding (Image.point)
+    # and counting (Image.getcolors) run in PIL.
+    im = pixbuf_to_pil(edges)
+    pixel_count = im.size[0] * im.size[1]
+    grouped = im.point(_EDGE_COLOR_GROUPS * len(im.getbands()))
+    prominent_group = max(grouped.getcolors(pixel_count))[1]
+
+    # Walk the colors from most to least used: the first one in the
+    # prominent group is usually the most used color overall, so only
+    # a few colors have to be mapped to their group.
+    for count, color in sorted(im.getcolors(pixel_count), reverse=True):
+        if tuple(_EDGE_COLOR_GROUPS[c] for c in color) == prominent_group:
+            return [c * 257 for c in color[:3]]
 
 def pil_to_pixbuf(im, keep_orientation=False):
     """Return a pixbuf created from the PIL <im>."""
@@ -342,120 +333,144 @@ def set_from_pixbuf(image, pixbuf):
     else:
         return image.set_from_pixbuf(pixbuf)
 
-def load_pixbuf(path):
-    """ Loads a pixbuf from a given image file. """
+def _load_gdkpixbuf(path):
+    """ Loads a pixbuf from a given image file with GdkPixbuf. """
+    pixbuf = None
+    if prefs['animation mode'] != constants.ANIMATION_DISABLED:
+        try:
+            pixbuf = GdkPixbuf.PixbufAnimation.new_from_file(path)
+            if pixbuf.is_static_image():
+                pixbuf = pixbuf.get_static_image()
+        except GLib.GError:
+            # NOTE: Broken JPEGs sometimes result in this exception.
+            # However, one may be able to load them using
+            # Gdk.pixbuf_new_from_file, so we need to continue.
+            pass
+    if pixbuf is None:
+        pixbuf = GdkPixbuf.Pixbuf.new_from_file(path)
+    return pixbuf
+
+def _load_pil(path):
+    """ Loads a pixbuf from a given image file with PIL. """
+    # TODO When using PIL, whether or how animations work is
+    # currently undefined.
+    im = Image.open(path)
+    return pil_to_pixbuf(im, keep_orientation=True)
+
+def _load_gdkpixbuf_size(path, width, height, image_format, image_dimensions):
+    """ Loads a pixbuf from a given image file with GdkPixbuf, scaled to
+    fit inside (width, height). """
+    # If we could not get the image info, still try to load
+    # the image to let GdkPixbuf raise the appropriate exception.
+    if (0, 0) == image_dimensions:
+        return GdkPixbuf.Pixbuf.new_from_file(path)
+    # Work around GdkPixbuf bug: https://bugzilla.gnome.org/show_bug.cgi?id=735422
+    # (currently https://gitlab.gnome.org/GNOME/gdk-pixbuf/issues/45)
+    if 'GIF' == image_format:
+        return GdkPixbuf.Pixbuf.new_from_file(path)
+    # Don't upscale if smaller than target dimensions!
+    image_width, image_height = image_dimensions
+    if image_width <= width and image_height <= height:
+        width, height = image_width, image_height
+    return GdkPixbuf.Pixbuf.new_from_file_at_scale(path, width, height, True)
+
+def _load_pil_size(path, width, height, image_format, image_dimensions):
+    """ Loads a pixbuf from a given image file with PIL, reduced to about
+    the size that fits inside (width, height). """
+    im = Image.open(path)
+    im.draft(None, (width, height))
+    # Shrink by an integer factor first (a cheap box filter),
+    # as long as the image still covers the fitted size.
+    factor = max(im.size[0] // width, im.size[1] // height)
+    if factor > 1 and im.mode in ('L', 'RGB', 'RGBA') and \
+       hasattr(im, 'reduce'):
+        im = im.reduce(factor)
+    return pil_to_pixbuf(im, keep_orientation=True)
+
+def _load_gdkpixbuf_data(imgdata):
+    """ Loads a pixbuf from the data passed in <imgdata> with GdkPixbuf. """
+    loader = GdkPixbuf.PixbufLoader()
+    loader.write(imgdata)
+    loader.close()
+    return loader.get_pixbuf()
+
+def _load_pil_data(imgdata):
+    """ Loads a pixbuf from the data passed in <imgdata> with PIL. """
+    return pil_to_pixbuf(Image.open(BytesIO(imgdata)), keep_orientation=True)
+
+# Loader functions by provider, for each way of loading a pixbuf.
+_LOADERS = {
+    constants.IMAGEIO_GDKPIXBUF: _load_gdkpixbuf,
+    constants.IMAGEIO_PIL: _load_pil,
+}
+_SIZE_LOADERS = {
+    constants.IMAGEIO_GDKPIXBUF: _load_gdkpixbuf_size,
+    constants.IMAGEIO_PIL: _load_pil_size,
+}
+_DATA_LOADERS = {
+    constants.IMAGEIO_GDKPIXBUF: _load_gdkpixbuf_data,
+    constants.IMAGEIO_PIL: _load_pil_data,
+}
+
+def _load_with_providers(loaders, providers, args, description):
+    """ Returns the pixbuf loaded by calling the function registered in
+    <loaders> for each of <providers> in turn with <args>, until one
+    succeeds. <description> is only used for logging. """
     pixbuf = None
     last_error = None
-    providers = get_image_info(path)[2]
     for provider in providers:
         try:
-            # TODO use dynamic dispatch instead of "if" chain
-            if provider == constants.IMAGEIO_GDKPIXBUF:
-                if prefs['animation mode'] != constants.ANIMATION_DISABLED:
-                    try:
-                        pixbuf = GdkPixbuf.PixbufAnimation.new_from_file(path)
-                        if pixbuf.is_static_image():
-                            pixbuf = pixbuf.get_static_image()
-                    except GLib.GError:
-                        # NOTE: Broken JPEGs sometimes result in this exception.
-                        # However, one may be able to load them using
-                        # Gdk.pixbuf_new_from_file, so we need to continue.
-                        pass
-                if pixbuf is None:
-                    pixbuf = GdkPixbuf.Pixbuf.new_from_file(path)
-            elif provider == constants.IMAGEIO_PIL:
-                # TODO When using PIL, whether or how animations work is
-                # currently undefined.
-                im = Image.open(path)
-                pixbuf = pil_to_pixbuf(im, keep_orientation=True)
-            else:
-                raise TypeError()
+            pixbuf = loaders[provider](*args)
         except Exception as e:
             # current provider could not load image
             last_error = e
         if pixbuf is not None:
             # stop loop on success
-            log.debug("provider %s succeeded in loading %s", provider, path)
+            log.debug("provider %s succeeded in %s", provider, description)
             break
-        log.debug("provider %s failed to load %s", provider, path)
+        log.debug("provider %s failed in %s", provider, description)
     if pixbuf is None:
         # raising necessary because caller expects pixbuf to be not None
         raise last_error or TypeError()
     return pixbuf
 
+def load_pixbuf(path):
+    """ Loads a pixbuf from a given image file. """
+    providers = get_image_info(path)[2]
+    return _load_with_providers(_LOADERS, providers, (path,),
+                                f'loading {path}')
+
 def load_pixbuf_size(path, width, height):
     """ Loads a pixbuf from a given image file and scale it to fit
     inside (width, height). """
-    # TODO similar to load_pixbuf, should be merged using callbacks etc.
-    pixbuf = None
-    last_error = None
     image_format, image_dimensions, providers = get_image_info(path)
-    for provider in providers:
-        try:
-            # TODO use dynamic dispatch instead of "if" chain
-            if provider == constants.IMAGEIO_GDKPIXBUF:
-                # If we could not get the image info, still try to load
-                # the image to let GdkPixbuf raise the appropriate exception.
-                if (0, 0) == image_dimensions:
-                    pixbuf = GdkPixbuf.Pixbuf.new_from_file(path)
-                # Work around GdkPixbuf bug: https://bugzilla.gnome.org/show_bug.cgi?id=735422
-                # (currently https://gitlab.gnome.org/GNOME/gdk-pixbuf/issues/45)
-                elif 'GIF' == image_format:
-                    pixbuf = GdkPixbuf.Pixbuf.new_from_file(path)
-                else:
-                    # Don't upscale if smaller than target dimensions!
-                    image_width, image_height = image_dimensions
-                    if image_width <= width and image_height <= height:
-                        width, height = image_width, image_height
-                    pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_size(path, width, height)
-            elif provider == constants.IMAGEIO_PIL:
-                im = Image.open(path)
-                im.draft(None, (width, height))
-                pixbuf = pil_to_pixbuf(im, keep_orientation=True)
-            else:
-                raise TypeError()
-        except Exception as e:
-            # current provider could not load image
-            last_error = e
-        if pixbuf is not None:
-            # stop loop on success
-            log.debug("provider %s succeeded in loading %s at size %s", provider, path, (width, height))
-            break
-        log.debug("provider %s failed to load %s at size %s", provider, path, (width, height))
-    if pixbuf is None:
-        # raising necessary because caller expects pixbuf to be not None
-        raise last_error or TypeError()
-    return fit_in_rectangle(pixbuf, width, height, GdkPixbuf.InterpType.BILINEAR)
+    pixbuf = _load_with_providers(
+        _SIZE_LOADERS, providers,
+        (path, width, height, image_format, image_dimensions),
+        f'loading {path} at size {(width, height)}')
+    # Pixbufs already decoded to fit are returned as is (transparent ones
+    # get composited), others are scaled down.
+    return fit_in_rectangle(pixbuf, width, height,
+                            scaling_quality=GdkPixbuf.InterpType.BILINEAR)
 
 def load_pixbuf_data(imgdata):
     """ Loads a pixbuf from the data passed in <imgdata>. """
-    # TODO similar to load_pixbuf, should be merged using callbacks etc.
-    pixbuf = None
-    last_error = None
-    for provider in (constants.IMAGEIO_GDKPIXBUF, constants.IMAGEIO_PIL):
-        try:
-            # TODO use dynamic dispatch instead of "if" chain
-            if provider == constants.IMAGEIO_GDKPIXBUF:
-                loader = GdkPixbuf.PixbufLoader()
-                loader.write(imgdata)
-                loader.close()
-                pixbuf = loader.get_pixbuf()
-            elif provider == constants.IMAGEIO_PIL:
-                pixbuf = pil_to_pixbuf(Image.open(StringIO(imgdata)), keep_orientation=True)
-            else:
-                raise TypeError()
-        except Exception as e:
-            # current provider could not load image
-            last_error = e
-        if pixbuf is not None:
-            # stop loop on success
-            log.debug("provider %s succeeded in decoding %s bytes", provider, len(imgdata))
-            break
-        log.debug("provider %s failed to decode %s bytes", provider, len(imgdata))
-    if pixbuf is None:
-        # raising necessary because caller expects pixbuf to be not None
-        raise last_error
-    return pixbuf
+    return _load_with_providers(
+        _DATA_LOADERS, (constants.IMAGEIO_GDKPIXBUF, constants.IMAGEIO_PIL),
+        (imgdata,), f'decoding {len(imgdata)} bytes')
+
+def _apply_lut(im, lut):
+    """ Returns <im> with the 256-entry lookup table <lut> applied to its
+    color bands (alpha is left unchanged). """
+    if lut == _IDENTITY_LUT:
+        return im
+    bands = im.getbands()
+    table = []
+    for band in bands:
+        table.extend(_IDENTITY_LUT if band == 'A' else lut)
+    return im.point(table)
+
+_IDENTITY_LUT = list(range(256))
 
 def enhance(pixbuf, brightness=1.0, contrast=1.0, saturation=1.0,
   sharpness=1.0, autocontrast=False, invert_color=False):
@@ -466,17 +481,35 @@ def enhance(pixbuf, brightness=1.0, contrast=1.0, saturation=1.0,
     it is L or RGB.)
     """
     im = pixbuf_to_pil(pixbuf)
+    # Brightness, contrast and color inversion are point operations: they
+    # are combined into a single lookup table, applied in one pass. The
+    # table follows the blends done by ImageEnhance.Brightness/Contrast,
+    # but results may differ from chaining those by a level or so, from
+    # rounding (see the contrast mean below).
+    lut = _IDENTITY_LUT
     if brightness != 1.0:
-        im = ImageEnhance.Brightness(im).enhance(brightness)
+        lut = [min(int(v * brightness), 255) for v in lut]
     if autocontrast and im.mode in ('L', 'RGB'):
-        im = ImageOps.autocontrast(im, cutoff=0.1)
+        im = ImageOps.autocontrast(_apply_lut(im, lut), cutoff=0.1)
+        lut = _IDENTITY_LUT
     elif contrast != 1.0:
-        im = ImageEnhance.Contrast(im).enhance(contrast)
+        # Like ImageEnhance.Contrast, pivot around the mean grey level. It
+        # is taken from the grey levels of the original image mapped through
+        # the table, instead of from the brightened image converted to grey.
+        histogram = im.convert('L').histogram()
+        mean = int(sum(lut[v] * count for v, count in enumerate(histogram))
+                   / max(sum(histogram), 1) + 0.5)
+        lut = [min(max(int(mean + contrast * (v - mean)), 0), 255) for v in lut]
+    # Inversion can only be merged when nothing else is applied after it.
+    merge_invert = invert_color and saturation == 1.0 and sharpness == 1.0
+    if merge_invert:
+        lut = [255 - v for v in lut]
+    im = _apply_lut(im, lut)
     if saturation != 1.0:
         im = ImageEnhance.Color(im).enhance(saturation)
     if sharpness != 1.0:
         im = ImageEnhance.Sharpness(im).enhance(sharpness)
-    if invert_color:
+    if invert_color and not merge_invert:
         im = ImageOps.invert(im)
     return pil_to_pixbuf(im)
 
@@ -499,9 +532,11 @@ def _get_png_implied_rotation(pixbuf_or_image):
         return None
     size = int(exif_lines[2])
     try:
-        data = bytes.fromhex(''.join(exif_lines[3:]))
+        hex_data = ''.join(exif_lines[3:]).encode('ascii')
+        data = binascii.unhexlify(hex_data.translate(None, b' \t\r'))
     except ValueError:
-        # Not valid hexadecimal content.
+        # Not valid hexadecimal content (binascii.Error and
+        # UnicodeEncodeError are both ValueErrors).
         return None
     if size != len(data):
         # Sizes should match.
@@ -522,6 +557,11 @@ def get_implied_rotation(pixbuf):
     and the pixbuf loader will set the orientation option correspondingly.
     """
     pixbuf = static_image(pixbuf)
+    # The result is cached on the pixbuf, as parsing PNG Exif data
+    # is not cheap and this is called again on each redraw.
+    rotation = getattr(pixbuf, 'implied_rotation', None)
+    if rotation is not None:
+        return rotation
     orientation = getattr(pixbuf, 'orientation', None)
     if orientation is None:
         orientation = pixbuf.get_option('orientation')
@@ -529,12 +569,15 @@ def get_implied_rotation(pixbuf):
         # Maybe it's a PNG? Try alternative method.
         orientation = _get_png_implied_rotation(pixbuf)
     if orientation == '3':
-        return 180
+        rotation = 180
     elif orientation == '6':
-        return 90
+        rotation = 90
     elif orientation == '8':
-        return 270
-    return 0
+        rotation = 270
+    else:
+        rotation = 0
+    setattr(pixbuf, 'implied_rotation', rotation)
+    return rotation
 
 
 def get_size_rotation(width, height):
@@ -563,19 +606,16 @@ def combine_pixbufs( pixbuf1, pixbuf2, are_in_manga_mode ):
         l_source_pixbuf = pixbuf1
         r_source_pixbuf = pixbuf2
 
-    has_alpha = False
-
-    if l_source_pixbuf.get_property( 'has-alpha' ) or \
-       r_source_pixbuf.get_property( 'has-alpha' ):
-        has_alpha = True
+    has_alpha = l_source_pixbuf.get_has_alpha() or \
+                r_source_pixbuf.get_has_alpha()
 
     bits_per_sample = 8
 
-    l_source_pixbuf_width = l_source_pixbuf.get_property( 'width' )
-    r_source_pixbuf_width = r_source_pixbuf.get_property( 'width' )
+    l_source_pixbuf_width = l_source_pixbuf.get_width()
+    r_source_pixbuf_width = r_source_pixbuf.get_width()
 
-    l_source_pixbuf_height = l_source_pixbuf.get_property( 'height' )
-    r_source_pixbuf_height = r_source_pixbuf.get_property( 'height' )
+    l_source_pixbuf_height = l_source_pixbuf.get_height()
+    r_source_pixbuf_height = r_source_pixbuf.get_height()
 
     new_width = l_source_pixbuf_width + r_source_pixbuf_width
 
@@ -594,12 +634,24 @@ def combine_pixbufs( pixbuf1, pixbuf2, are_in_manga_mode ):
                                      r_source_pixbuf_height,
                                      new_pix_buf, l_source_pixbuf_width, 0 )
 
+    # New pixbufs are not initialized: clear the area below the shorter
+    # page, the only part of the canvas not covered by the pages.
+    if l_source_pixbuf_height < new_height:
+        new_pix_buf.new_subpixbuf( 0, l_source_pixbuf_height,
+                                   l_source_pixbuf_width,
+                                   new_height - l_source_pixbuf_height ).fill( 0 )
+    elif r_source_pixbuf_height < new_height:
+        new_pix_buf.new_subpixbuf( l_source_pixbuf_width, r_source_pixbuf_height,
+                                   r_source_pixbuf_width,
+                                   new_height - r_source_pixbuf_height ).fill( 0 )
+
     return new_pix_buf
 
 def is_image_file(path):
     """Return True if the file at <path> is an image file recognized by PyGTK.
     """
-    return _SUPPORTED_IMAGE_REGEX.search(path) is not None
+    _, dot, extension = path.rpartition('.')
+    return bool(dot) and extension.lower() in _SUPPORTED_IMAGE_EXTENSIONS
 
 def convert_rgb16list_to_rgba8int(c):
     return 0x000000FF | (c[0] >> 8 << 24) | (c[1] >> 8 << 16) | (c[2] >> 8 << 8)
@@ -621,7 +673,24 @@ def get_image_info(path):
     """Return information about and select preferred providers for loading
     the image specified by C{path}. The result is a tuple
     C{(format, (width, height), providers)}.
+
+    Results are cached, as long as the file's modification time and size
+    don't change.
     """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return _get_image_info(path)
+    return _get_cached_image_info(path, stat.st_mtime_ns, stat.st_size)
+
+@functools.lru_cache(maxsize=4096)
+def _get_cached_image_info(path, mtime_ns, size):
+    """ Cached version of L{_get_image_info}, <mtime_ns> and <size> are
+    only part of the cache key. """
+    return _get_image_info(path)
+
+def _get_image_info(path):
+    """ Implementation of L{get_image_info}. """
     image_format = None
     image_dimensions = None
     providers = ()
@@ -651,41 +720,71 @@ def get_image_info(path):
         image_dimensions = (0, 0)
     return (image_format, image_dimensions, providers)
 
+def _collect_pil_formats():
+    """ Returns a dict of format name -> (mime types, extensions) for
+    the formats supported by PIL. """
+    # Make sure all supported formats are registered.
+    Image.init()
+    # Not all PIL formats register a mime type,
+    # fill in the blanks ourselves.
+    supported_formats_pil = {
+        'BMP': (['image/bmp', 'image/x-bmp', 'image/x-MS-bmp'], []),
+        'ICO': (['image/x-icon', 'image/x-ico', 'image/x-win-bitmap'], []),
+        'PCX': (['image/x-pcx'], []),
+        'PPM': (['image/x-portable-pixmap'], []),
+        'TGA': (['image/x-tga'], []),
+    }
+    for name, mime in list(Image.MIME.items()):
+        mime_types, extensions = supported_formats_pil.get(name, ([], []))
+        supported_formats_pil[name] = mime_types + [mime], extensions
+    for ext, name in list(Image.EXTENSION.items()):
+        assert '.' == ext[0]
+        mime_types, extensions = supported_formats_pil.get(name, ([], []))
+        supported_formats_pil[name] = mime_types, extensions + [ext[1:]]
+    # Remove formats with no mime type or extension.
+    for name in list(supported_formats_pil.keys()):
+        mime_types, extensions = supported_formats_pil[name]
+        if not mime_types or not extensions:
+            del supported_formats_pil[name]
+    # Remove archives/videos formats.
+    for name in (
+        'MPEG',
+        'PDF',
+    ):
+        if name in supported_formats_pil:
+            del supported_formats_pil[name]
+    return supported_formats_pil
+
+def _get_pil_formats():
+    """ Same as L{_collect_pil_formats}, but cached on disk: Image.init()
+    imports every PIL plugin, which is slow on startup. The cache is
+    only used with the MComix and Pillow versions that wrote it. """
+    path = constants.PIL_FORMATS_CACHE_PATH
+    cache_key = (constants.VERSION, PIL.__version__)
+    try:
+        with open(path, 'rb') as f:
+            key, formats = pickle.load(f)
+        if key == cache_key:
+            return formats
+    except Exception:
+        # Missing, outdated or corrupt cache.
+        pass
+    formats = _collect_pil_formats()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump((cache_key, formats), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+    except OSError as e:
+        log.debug('Could not write PIL formats cache: %s', e)
+    return formats
+
 def get_supported_formats():
     global _SUPPORTED_IMAGE_FORMATS
     if _SUPPORTED_IMAGE_FORMATS is None:
 
         # Step 1: Collect PIL formats
-        # Make sure all supported formats are registered.
-        Image.init()
-        # Not all PIL formats register a mime type,
-        # fill in the blanks ourselves.
-        supported_formats_pil = {
-            'BMP': (['image/bmp', 'image/x-bmp', 'image/x-MS-bmp'], []),
-            'ICO': (['image/x-icon', 'image/x-ico', 'image/x-win-bitmap'], []),
-            'PCX': (['image/x-pcx'], []),
-            'PPM': (['image/x-portable-pixmap'], []),
-            'TGA': (['image/x-tga'], []),
-        }
-        for name, mime in list(Image.MIME.items()):
-            mime_types, extensions = supported_formats_pil.get(name, ([], []))
-            supported_formats_pil[name] = mime_types + [mime], extensions
-        for ext, name in list(Image.EXTENSION.items()):
-            assert '.' == ext[0]
-            mime_types, extensions = supported_formats_pil.get(name, ([], []))
-            supported_formats_pil[name] = mime_types, extensions + [ext[1:]]
-        # Remove formats with no mime type or extension.
-        for name in list(supported_formats_pil.keys()):
-            mime_types, extensions = supported_formats_pil[name]
-            if not mime_types or not extensions:
-                del supported_formats_pil[name]
-        # Remove archives/videos formats.
-        for name in (
-            'MPEG',
-            'PDF',
-        ):
-            if name in supported_formats_pil:
-                del supported_formats_pil[name]
+        supported_formats_pil = _get_pil_formats()
 
         # Step 2: Collect GDK Pixbuf formats
         supported_formats_gdk = {}
@@ -713,9 +812,9 @@ def get_supported_formats():
     return _SUPPORTED_IMAGE_FORMATS
 
 _SUPPORTED_IMAGE_FORMATS = None
-# Set supported image extensions regexp from list of supported formats.
-# Only used internally.
-_SUPPORTED_IMAGE_REGEX = tools.formats_to_regex(get_supported_formats())
-log.debug("_SUPPORTED_IMAGE_REGEX='%s'", _SUPPORTED_IMAGE_REGEX.pattern)
+# Set of (lowercase) supported image extensions, from the list of
+# supported formats. Only used internally.
+_SUPPORTED_IMAGE_EXTENSIONS = tools.formats_to_extset(get_supported_formats())
+log.debug("_SUPPORTED_IMAGE_EXTENSIONS=%s", sorted(_SUPPORTED_IMAGE_EXTENSIONS))
 
 # vim: expandtab:sw=4:ts=4
@@ -2,7 +2,7 @@
 
 import math
 
-from gi.repository import Gdk, GdkPixbuf, Gtk
+from gi.repository import Gdk, GdkPixbuf, GLib, Gtk
 
 from mcomix.preferences import prefs
 from mcomix import image_tools
@@ -11,6 +11,45 @@ from mcomix import box
 from mcomix import tools
 
 
+def _calc_lens_1d(ref_pos, csize, src_pixbuf_size, lens_size, lens_scale):
+    """ Computes the scales, sizes and positions needed to draw a source
+    pixbuf into the lens, along one axis (the computations are the same for
+    each axis). """
+    # compute initial scales, sizes and positions
+    page_scale = csize / src_pixbuf_size
+    source_ref_pos = ref_pos / page_scale
+    combined_source_scale = page_scale * lens_scale
+    mapped_ref_pos = source_ref_pos * combined_source_scale
+    mapped_ref_pos_int = int(round(mapped_ref_pos * 2)) // 2
+    mapped_size = int(round(src_pixbuf_size * combined_source_scale))
+    # take rounding errors into account
+    applied_source_scale = mapped_size / src_pixbuf_size
+    # calculate data for clamping
+    lens_size_2q, lens_size_2r = divmod(lens_size, 2)
+    neg_mapped_lens_pos = lens_size_2q - mapped_ref_pos_int
+    dest_lens_offset = neg_mapped_lens_pos
+    dest_lens_end = dest_lens_offset + mapped_size
+    # clamp to lens
+    dest_lens_end = min(dest_lens_end, lens_size)
+    dest_lens_offset = max(0, dest_lens_offset)
+    dest_lens_size = dest_lens_end - dest_lens_offset
+    return applied_source_scale, neg_mapped_lens_pos, dest_lens_offset, \
+        dest_lens_size, mapped_size, mapped_ref_pos_int, lens_size_2q, lens_size_2r
+
+
+def _get_interpolation(lens_interpolation, scaling_quality, applied_source_scale):
+    """ Returns the interpolation type for drawing a source pixbuf into the
+    lens at <applied_source_scale>. Unless the user chose a specific one,
+    clear upscales use NEAREST, which is much faster than the other types
+    and shows the magnified pixels as they are, and anything else uses the
+    image <scaling_quality>. """
+    if lens_interpolation != constants.LENS_INTERPOLATION_AUTO:
+        return lens_interpolation
+    if min(applied_source_scale) >= 1.5:
+        return GdkPixbuf.InterpType.NEAREST
+    return scaling_quality
+
+
 class MagnifyingLens(object):
 
     """The MagnifyingLens creates cursors from the raw pixbufs containing
@@ -23,17 +62,34 @@ class MagnifyingLens(object):
     module as it uses implementation details not in the interface.
     """
 
+    #: Extra lens content (in pixels) rendered on each side of the lens,
+    #: so that small cursor moves can reuse it
+    _CACHE_MARGIN = 64
+
     def __init__(self, window):
         self._window = window
         self._area = self._window._main_layout
         self._area.connect('motion-notify-event', self._motion_event)
+        self._area.connect('size-allocate', self._invalidate_visible_area)
+        self._window._hadjust.connect('value-changed', self._invalidate_visible_area)
+        self._window._vadjust.connect('value-changed', self._invalidate_visible_area)
 
         #: Stores lens state
         self._enabled = False
         #: Stores a tuple of the last mouse coordinates
         self._point = None
+        #: Whether drawing the lens at _point is already scheduled
+        self._waiting_for_redraw = False
         #: Stores the last rectangle that was used to render the lens
         self._last_lens_rect = None
+        #: Stores (content key, lens content with margins, cursor position)
+        #: for the last rendered lens content, see _get_cached_lens_content
+        self._cache = None
+        #: Reusable pixbufs by name, see _get_scratch_pixbuf
+        self._scratch = {}
+        #: Bottom right corner of the visible part of the layout area,
+        #: see _calculate_lens_rect
+        self._visible_area = None
 
     def get_enabled(self):
         return self._enabled
@@ -52,6 +108,9 @@ class MagnifyingLens(object):
             self._window.cursor_handler.set_cursor_type(constants.NORMAL_CURSOR)
             self._clear_lens()
             self._last_lens_rect = None
+            # Don't keep the (source pixbufs of the) lens content around.
+            self._cache = None
+            self._scratch = {}
 
     enabled = property(get_enabled, set_enabled)
 
@@ -69,11 +128,16 @@ class MagnifyingLens(object):
         rectangle = self._calculate_lens_rect(x, y, *lens_size, border_size)
 
         draw_region = Gdk.Rectangle()
-        draw_region.x, draw_region.y, draw_region.width, draw_region.height = rectangle
         if self._last_lens_rect:
-            last_region = Gdk.Rectangle()
-            last_region.x, last_region.y, last_region.width, last_region.height = self._last_lens_rect
-            draw_region = Gdk.rectangle_union(draw_region, last_region)
+            # Union of both rectangles, without a round trip through GDK.
+            x1, y1, w1, h1 = rectangle
+            x2, y2, w2, h2 = self._last_lens_rect
+            draw_region.x = min(x1, x2)
+            draw_region.y = min(y1, y2)
+            draw_region.width = max(x1 + w1, x2 + w2) - draw_region.x
+            draw_region.height = max(y1 + h1, y2 + h2) - draw_region.y
+        else:
+            draw_region.x, draw_region.y, draw_region.width, draw_region.height = rectangle
 
         pixbuf = self._get_lens_pixbuf(x, y, lens_size, border_size,
             (x - rectangle[0], y - rectangle[1]))
@@ -99,14 +163,21 @@ class MagnifyingLens(object):
         lens_x = max(x - width // 2, 0)
         lens_y = max(y - height // 2, 0)
 
-        max_width, max_height = self._window.get_visible_area_size()
-        max_width += int(self._window._hadjust.get_value())
-        max_height += int(self._window._vadjust.get_value())
+        if self._visible_area is None:
+            max_width, max_height = self._window.get_visible_area_size()
+            max_width += int(self._window._hadjust.get_value())
+            max_height += int(self._window._vadjust.get_value())
+            self._visible_area = (max_width, max_height)
+        max_width, max_height = self._visible_area
         lens_x = min(lens_x, max_width - width)
         lens_y = min(lens_y, max_height - height)
 
         return lens_x, lens_y, width + 2 * border_size, height + 2 * border_size
 
+    def _invalidate_visible_area(self, *args):
+        """ Called when the layout area is resized or scrolled. """
+        self._visible_area = None
+
     def _clear_lens(self, current_lens_region=None):
         """ Invalidates the area that was damaged by the last call to draw_lens. """
 
@@ -126,9 +197,23 @@ class MagnifyingLens(object):
 
     def _motion_event(self, widget, event):
         """ Called whenever the mouse moves over the image area. """
-        self._point = (int(event.x), int(event.y))
-        if self.enabled:
+        point = (int(event.x), int(event.y))
+        if point == self._point:
+            return
+        self._point = point
+        # Draw once for all motion events received in the meantime.
+        if self.enabled and not self._waiting_for_redraw:
+            self._waiting_for_redraw = True
+            GLib.idle_add(self._draw_pending_lens,
+                          priority=GLib.PRIORITY_HIGH_IDLE)
+
+    def _draw_pending_lens(self):
+        """ Draws the lens at the last mouse coordinates, as scheduled by
+        _motion_event. """
+        self._waiting_for_redraw = False
+        if self.enabled and self._point:
             self._draw_lens(*self._point)
+        return False
 
     def _get_lens_pixbuf(self, x, y, lens_size, border_size, check_offset):
         """Get a pixbuf containing the appropiate image data for the lens
@@ -138,12 +223,83 @@ class MagnifyingLens(object):
         source_pixbufs = self._window.imagehandler.get_pixbufs(len(cb))
         transforms = self._window.transforms
         lens_scale = (prefs['lens magnification'],) * 2 # 2D only
-        opaque = prefs['checkered bg for transparent images'] or not any(
-            map(GdkPixbuf.Pixbuf.get_has_alpha, source_pixbufs))
-        canvas = GdkPixbuf.Pixbuf.new(colorspace=GdkPixbuf.Colorspace.RGB,
-            has_alpha=not opaque, bits_per_sample=8, width=lens_size[0],
-            height=lens_size[1]) # 2D only
-        canvas.fill(image_tools.convert_rgb16list_to_rgba8int(self._window.get_bg_colour()))
+        has_alpha = any(map(GdkPixbuf.Pixbuf.get_has_alpha, source_pixbufs))
+        opaque = prefs['checkered bg for transparent images'] or not has_alpha
+        bg_colour = image_tools.convert_rgb16list_to_rgba8int(self._window.get_bg_colour())
+        content = (cb, source_pixbufs, transforms, lens_scale, opaque,
+            prefs['lens interpolation'], prefs['scaling quality'], bg_colour)
+
+        if (has_alpha and opaque) or \
+           not all(float(s).is_integer() for s in lens_scale):
+            # The checkered background is aligned to the screen, not to the
+            # image, and fractional magnifications do not move the image by
+            # whole pixels: the content cannot be reused for another position.
+            self._cache = None
+            canvas = self._get_scratch_pixbuf('canvas', not opaque, *lens_size) # 2D only
+            self._draw_lens_content(canvas, x, y, lens_size,
+                (x - border_size - check_offset[0],
+                y - border_size - check_offset[1]), *content) # 2D only
+        else:
+            canvas = self._get_cached_lens_content(x, y, lens_size, content)
+
+        canvas = self._window.enhancer.enhance(canvas)
+
+        return image_tools.add_border(canvas, border_size)
+
+    def _get_cached_lens_content(self, x, y, lens_size, content):
+        """Get the lens content for the cursor position <x>, <y> from the
+        cached lens content, rendering it (with margins) if it is missing,
+        out of date or does not cover the lens at this position.
+
+        Moving the cursor by one pixel moves the image in the lens by exactly
+        <lens_scale> pixels, so the lens content is a window into the larger
+        rendered area.
+        """
+        margin = self._CACHE_MARGIN
+        key = (lens_size,) + content
+        if self._cache is not None and self._cache[0] == key:
+            cached, cache_pos = self._cache[1:]
+            lens_scale = content[3]
+            offset = [margin + int((p - cp) * s)
+                for p, cp, s in zip((x, y), cache_pos, lens_scale)] # 2D only
+            if all(0 <= o <= 2 * margin for o in offset):
+                return cached.new_subpixbuf(*offset, *lens_size) # 2D only
+        cache_size = [s + 2 * margin for s in lens_size]
+        # Kept until the content changes, so it can't use a scratch buffer.
+        cached = GdkPixbuf.Pixbuf.new(colorspace=GdkPixbuf.Colorspace.RGB,
+            has_alpha=not content[4], bits_per_sample=8, width=cache_size[0],
+            height=cache_size[1]) # 2D only
+        self._draw_lens_content(cached, x, y, cache_size, None, *content)
+        self._cache = (key, cached, (x, y))
+        return cached.new_subpixbuf(margin, margin, *lens_size) # 2D only
+
+    def _get_scratch_pixbuf(self, name, has_alpha, width, height):
+        """Get a pixbuf of <width> x <height> with undefined content, for
+        temporary use. It shares the data of the scratch buffer kept under
+        <name>, which is only reallocated when it is too small, instead of
+        allocating a new pixbuf on each motion event.
+        """
+        scratch = self._scratch.get(name)
+        if scratch is None or scratch.get_has_alpha() != has_alpha or \
+           scratch.get_width() < width or scratch.get_height() < height:
+            if scratch is not None and scratch.get_has_alpha() == has_alpha:
+                width = max(width, scratch.get_width())
+                height = max(height, scratch.get_height())
+            scratch = GdkPixbuf.Pixbuf.new(colorspace=GdkPixbuf.Colorspace.RGB,
+                has_alpha=has_alpha, bits_per_sample=8, width=width,
+                height=height)
+            self._scratch[name] = scratch
+        return scratch.new_subpixbuf(0, 0, width, height)
+
+    def _draw_lens_content(self, canvas, x, y, lens_size, check_offset, cb,
+        source_pixbufs, transforms, lens_scale, opaque, lens_interpolation,
+        scaling_quality, bg_colour):
+        """Draw the image data centered at the cursor position <x>, <y>
+        into <canvas> (of <lens_size>), without enhancements and border.
+        <check_offset> is the screen position of the lens, used to align
+        the checkered background of transparent images.
+        """
+        canvas.fill(bg_colour)
         for b, source_pixbuf, tf in zip(cb, source_pixbufs, transforms):
             if image_tools.is_animation(source_pixbuf):
                 continue
@@ -153,43 +309,15 @@ class MagnifyingLens(object):
                 source_pixbuf.get_has_alpha() and opaque else None
             self._draw_lens_pixbuf((x - cpos[0], y - cpos[1]), b.get_size(),
                 source_pixbuf, rotation, flips,
-                lens_size, lens_scale, canvas, prefs['scaling quality'],
-                composite_color_args, (x - border_size - check_offset[0],
-                y - border_size - check_offset[1])) # 2D only
-
-        canvas = self._window.enhancer.enhance(canvas)
-
-        return image_tools.add_border(canvas, border_size)
+                lens_size, lens_scale, canvas, lens_interpolation, scaling_quality,
+                composite_color_args, check_offset) # 2D only
 
     def _draw_lens_pixbuf(self, ref_pos, csize, srcbuf, rotation, flips,
-        lens_size, lens_scale, dstbuf, interpolation, composite_color_args,
-        check_offset):
+        lens_size, lens_scale, dstbuf, lens_interpolation, scaling_quality,
+        composite_color_args, check_offset):
         if tools.volume(csize) == 0:
             return
 
-        # Some computations are the same for each axis.
-        def calc_1d(ref_pos, csize, src_pixbuf_size, lens_size, lens_scale):
-            # compute initial scales, sizes and positions
-            page_scale = csize / src_pixbuf_size
-            source_ref_pos = ref_pos / page_scale
-            combined_source_scale = page_scale * lens_scale
-            mapped_ref_pos = source_ref_pos * combined_source_scale
-            mapped_ref_pos_int = int(round(mapped_ref_pos * 2)) // 2
-            mapped_size = int(round(src_pixbuf_size * combined_source_scale))
-            # take rounding errors into account
-            applied_source_scale = mapped_size / src_pixbuf_size
-            # calculate data for clamping
-            lens_size_2q, lens_size_2r = divmod(lens_size, 2)
-            neg_mapped_lens_pos = lens_size_2q - mapped_ref_pos_int
-            dest_lens_offset = neg_mapped_lens_pos
-            dest_lens_end = dest_lens_offset + mapped_size
-            # clamp to lens
-            dest_lens_end = min(dest_lens_end, lens_size)
-            dest_lens_offset = max(0, dest_lens_offset)
-            dest_lens_size = dest_lens_end - dest_lens_offset
-            return applied_source_scale, neg_mapped_lens_pos, dest_lens_offset, \
-                dest_lens_size, mapped_size, mapped_ref_pos_int, lens_size_2q, lens_size_2r
-
         # prepare actual computation
         src_pixbuf_size = [srcbuf.get_width(), srcbuf.get_height()] # 2D only
         transpose = (1, 0) if tools.rotation_swaps_axes(rotation) else (0, 1) # 2D only
@@ -199,8 +327,10 @@ class MagnifyingLens(object):
         # calculate size and position data
         applied_source_scale, neg_mapped_lens_pos, dest_lens_offset, dest_lens_size, \
             mapped_size, mapped_ref_pos_int, lens_size_2q, lens_size_2r = \
-            [list(x) for x in zip(*(map(calc_1d, tp(ref_pos), tp(csize),
-            src_pixbuf_size, tp(lens_size), tp(lens_scale))))]
+            zip(*map(_calc_lens_1d, tp(ref_pos), tp(csize),
+            src_pixbuf_size, tp(lens_size), tp(lens_scale)))
+        interpolation = _get_interpolation(lens_interpolation, scaling_quality,
+            applied_source_scale)
 
         if min(dest_lens_size) > 0:
             # Using GdkPixbuf.Pixbuf.scale here so we do not need to worry about
@@ -222,8 +352,8 @@ class MagnifyingLens(object):
                 refpos_tracking = tools.vector_sub(refpos_tracking, lens_size_2q)
 
                 # write to temporary buffer
-                tempbuf = GdkPixbuf.Pixbuf.new(srcbuf.get_colorspace(),
-                    srcbuf.get_has_alpha(), srcbuf.get_bits_per_sample(), *dest_lens_size)
+                tempbuf = self._get_scratch_pixbuf('temp',
+                    srcbuf.get_has_alpha(), *dest_lens_size)
                 temp_lens_box = box.Box.intersect(box.Box(lens_size, position=refpos_tracking),
                     box.Box(mapped_size))
                 srcbuf.scale(tempbuf, 0, 0, *dest_lens_size,
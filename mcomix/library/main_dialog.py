@@ -5,7 +5,6 @@ from gi.repository import Gdk, Gtk
 
 from mcomix.preferences import prefs
 from mcomix import i18n
-from mcomix import tools
 from mcomix import log
 from mcomix import file_chooser_library_dialog
 from mcomix import status
@@ -189,6 +188,5 @@ def _close_dialog(*args):
     if _dialog is not None:
         _dialog.destroy()
         _dialog = None
-        tools.garbage_collect()
 
 # vim: expandtab:sw=4:ts=4
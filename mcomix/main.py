@@ -461,7 +461,7 @@ class MainWindow(Gtk.Window):
                 if prefs['vertical flip']:
                     pixbuf_list[i] = image_tools.flip_pixbuf(pixbuf_list[i], 1)
                     self.transforms[i] += Transform.from_flips(False, True)
-                pixbuf_list[i] = self.enhancer.enhance(pixbuf_list[i])
+                pixbuf_list[i] = self.enhancer.enhance(pixbuf_list[i], cache=True)
 
             for i in range(pixbuf_count):
                 image_tools.set_from_pixbuf(self.images[i], pixbuf_list[i])
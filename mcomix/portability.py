@@ -2,6 +2,7 @@
 
 import ctypes
 import locale
+import re
 import sys
 
 from mcomix import constants
@@ -17,26 +18,28 @@ def uri_prefix() -> str:
         return "file://"
 
 
+# Matches the prefix of file URIs as "file://localhost/..." (correctly
+# formatted), "file:///..." (Nautilus etc.) or "file:/..." (Xffm etc.),
+# keeping the slash that starts the path.
+_FILE_URI_PREFIX = re.compile(r"^file:(?://localhost|//)?(?=/)")
+
+
 def normalize_uri(uri: str) -> str:
     """Normalize URIs passed into the program by different applications,
     normally via drag-and-drop."""
 
-    if uri.startswith("file://localhost/"):  # Correctly formatted.
-        return uri[16:]
-    elif uri.startswith("file:///"):  # Nautilus etc.
-        return uri[7:]
-    elif uri.startswith("file:/"):  # Xffm etc.
-        return uri[5:]
-    else:
-        return uri
+    return _FILE_URI_PREFIX.sub("", uri, count=1)
+
+
+if sys.platform == "win32":
+    _INVALID_FILESYSTEM_CHARS = r':*?"<>|' + "".join([chr(i) for i in range(0, 32)])
+else:
+    _INVALID_FILESYSTEM_CHARS = ""
 
 
 def invalid_filesystem_chars() -> str:
     """List of characters that cannot be used in filenames on the target platform."""
-    if sys.platform == "win32":
-        return r':*?"<>|' + "".join([chr(i) for i in range(0, 32)])
-    else:
-        return ""
+    return _INVALID_FILESYSTEM_CHARS
 
 
 def get_default_locale() -> str:
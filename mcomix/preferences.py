@@ -38,6 +38,7 @@ prefs = {
     'default manga mode': False,
     'lens magnification': 2,
     'lens size': 200,
+    'lens interpolation': constants.LENS_INTERPOLATION_AUTO,
     'virtual double page for fitting images': constants.SHOW_DOUBLE_AS_ONE_TITLE | \
                                               constants.SHOW_DOUBLE_AS_ONE_WIDE,
     'double step in double page mode': True,
@@ -99,7 +100,9 @@ prefs = {
     'language': 'auto',
     'statusbar fields': constants.STATUS_PAGE | constants.STATUS_RESOLUTION | \
                         constants.STATUS_PATH | constants.STATUS_FILENAME | constants.STATUS_FILESIZE,
-    'max threads': 3,
+    # Thumbnail decoding releases the GIL, so use the cores for it, up
+    # to a bound past which more threads mostly add memory use.
+    'max threads': min(max(os.cpu_count() or 1, 3), 8),
     'max extract threads': 1,
     'wrap mouse scroll': False,
     'scaling quality': 2,  # GdkPixbuf.InterpType.BILINEAR
@@ -333,6 +333,9 @@ class _PreferencesDialog(Gtk.Dialog):
             1, 1.1, 10.0, 0.1, 1.0, 1,
             _('Set the magnification factor of the magnifying lens.')))
 
+        page.add_row(Gtk.Label(label=_('Lens scaling quality:')),
+            self._create_lens_interpolation_combobox())
+
         page.new_section(_('Comments'))
 
         page.add_row(Gtk.Label(label=_('Comment extensions:')),
@@ -655,6 +658,29 @@ class _PreferencesDialog(Gtk.Dialog):
             if value != last_value:
                 self._window.draw_image()
 
+    def _create_lens_interpolation_combobox(self):
+        """ Creates combo box for the magnifying lens scaling quality """
+        items = (
+                (_('Automatic'), constants.LENS_INTERPOLATION_AUTO),
+                (_('Nearest (fastest)'), int(GdkPixbuf.InterpType.NEAREST)),
+                (_('Normal (fast)'), int(GdkPixbuf.InterpType.TILES)),
+                (_('Bilinear'), int(GdkPixbuf.InterpType.BILINEAR)),
+                (_('Hyperbolic (slow)'), int(GdkPixbuf.InterpType.HYPER)))
+
+        selection = prefs['lens interpolation']
+
+        box = self._create_combobox(items, selection, self._lens_interpolation_changed_cb)
+        box.set_tooltip_text(
+            _('Changes how the magnifying lens scales images. With "Automatic", magnified pixels are shown as they are, and the image scaling quality is used otherwise.'))
+
+        return box
+
+    def _lens_interpolation_changed_cb(self, combobox, *args):
+        """ Called when the magnifying lens scaling quality changes. """
+        iter = combobox.get_active_iter()
+        if combobox.get_model().iter_is_valid(iter):
+            prefs['lens interpolation'] = combobox.get_model().get_value(iter, 1)
+
     def _create_animation_mode_combobox(self):
         """ Creates combo box for animation mode """
         items = (
@@ -1,14 +1,13 @@
 """tools.py - Contains various helper functions."""
 
 import bisect
-import gc
 import itertools
 import math
 import operator
 import os
 import re
 import sys
-from functools import reduce
+from functools import lru_cache, reduce
 from typing import (Any, Iterable, List, Mapping, Sequence, Tuple, TypeVar,
                     Union)
 
@@ -18,35 +17,28 @@ NUMERIC_REGEXP = re.compile(r"\d+|\D+")  # Split into numerics and characters
 PREFIXED_BYTE_UNITS = ("B", "KiB", "MiB", "GiB", "TiB", "PiB", "EiB", "ZiB", "YiB", "RiB", "QiB")
 
 
-def cmp(a: str, b: str) -> int:
+def cmp(a: Any, b: Any) -> int:
     """ Forward port of Python2's cmp function """
     return (a > b) - (a < b)
 
 
-class AlphanumericSortKey:
-    """ Compares two strings by their natural order (i.e. 1 before 10) """
-    def __init__(self, filename: str) -> None:
-        self.filename_parts: List[Union[int, str]] = [
-            int(part) if part.isdigit() else part
-            for part in NUMERIC_REGEXP.findall(filename.lower())
-        ]
-
-    def __lt__(self, other: 'AlphanumericSortKey') -> bool:
-        for left, right in itertools.zip_longest(self.filename_parts, other.filename_parts, fillvalue=''):
-            if not isinstance(left, type(right)):
-                left_str = str(left)
-                right_str = str(right)
-                if left_str < right_str:
-                    return True
-                elif left_str > right_str:
-                    return False
-            else:
-                if left < right:
-                    return True
-                elif left > right:
-                    return False
-
-        return False
+@lru_cache(maxsize=65536)
+def alphanumeric_sort_key(filename: str) -> Tuple[Tuple[int, Union[int, str]], ...]:
+    """ Returns a key for comparing strings by their natural order
+    (i.e. 1 before 10).
+
+    The string is split into numeric and non-numeric parts, each tagged so
+    that plain tuple comparison orders them: numbers compare by value, and
+    against text as if written out in digits, i.e. after text starting with
+    a character lower than '0' and before any other text.
+
+    Keys only depend on the string, so they are cached: the same names are
+    sorted again on each directory scan, and the library compares its
+    books pairwise. """
+    return tuple(
+        (1, int(part)) if part.isdigit() else (0 if part < '0' else 2, part)
+        for part in NUMERIC_REGEXP.findall(filename.lower())
+    )
 
 
 def alphanumeric_sort(filenames: List[str]) -> None:
@@ -55,7 +47,7 @@ def alphanumeric_sort(filenames: List[str]) -> None:
     ordering.
     """
 
-    filenames.sort(key=AlphanumericSortKey)
+    filenames.sort(key=alphanumeric_sort_key)
 
 
 def bin_search(lst: List, value: Any) -> int:
@@ -114,6 +106,22 @@ def get_data_directory() -> str:
         return os.path.join(base_path, 'mcomix')
 
 
+def get_cache_directory() -> str:
+    """Return the path to the MComix cache directory. On UNIX, this will
+    be $XDG_CACHE_HOME/mcomix, on Windows it will be in
+    %LOCALAPPDATA%/MComix.
+
+    See http://standards.freedesktop.org/basedir-spec/latest/ for more
+    information on the $XDG_CACHE_HOME environmental variable.
+    """
+    if sys.platform == 'win32':
+        return os.path.join(os.path.expandvars('%LOCALAPPDATA%'), 'MComix')
+    else:
+        base_path = os.getenv('XDG_CACHE_HOME',
+                              os.path.join(get_home_directory(), '.cache'))
+        return os.path.join(base_path, 'mcomix')
+
+
 def number_of_digits(n: int) -> int:
     if 0 == n:
         return 1
@@ -121,6 +129,11 @@ def number_of_digits(n: int) -> int:
 
 
 def decompose_byte_size_exponent(n: float) -> Tuple[float, int]:
+    if isinstance(n, int) and n >= 0:
+        # Number of divisions by 1024 needed to get n <= 1024,
+        # i.e. n <= 2 ** (10 * (e + 1)).
+        e = max(((n - 1).bit_length() + 9) // 10 - 1, 0)
+        return (n / (1 << (10 * e)), e)
     e = 0
     while n > 1024.0:
         n /= 1024.0
@@ -138,51 +151,66 @@ def format_byte_size(n: float) -> str:
         (nn, byte_size_exponent_to_prefix(e))
 
 
-def garbage_collect() -> None:
-    """ Runs the garbage collector. """
-    gc.collect(0)
-
-
 def div(a: Numeric, b: Numeric) -> float:
     return float(a) / float(b)
 
 
-def volume(t: List[int]) -> int:
-    return reduce(operator.mul, t, 1)
+if hasattr(math, 'prod'):
+    def volume(t: List[int]) -> int:
+        return math.prod(t)
+else:
+    # Python 3.7
+    def volume(t: List[int]) -> int:
+        return reduce(operator.mul, t, 1)
 
 
 def relerr(approx: Numeric, ideal: Numeric) -> float:
     return abs(div(approx - ideal, ideal))
 
 
+# The vector functions below are mostly called with 2D vectors, which get a
+# fast path without map() and operator calls.
+
 def smaller(a: List, b: List) -> List:
     """ Returns a list with the i-th element set to True if and only if the i-th
     element in a is less than the i-th element in b. """
+    if len(a) == 2:
+        return [a[0] < b[0], a[1] < b[1]]
     return list(map(operator.lt, a, b))
 
 
 def smaller_or_equal(a: List, b: List) -> List:
     """ Returns a list with the i-th element set to True if and only if the i-th
     element in a is less than or equal to the i-th element in b. """
+    if len(a) == 2:
+        return [a[0] <= b[0], a[1] <= b[1]]
     return list(map(operator.le, a, b))
 
 
 def scale(t: Sequence[Numeric], factor: Numeric) -> List[Numeric]:
+    if len(t) == 2:
+        return [t[0] * factor, t[1] * factor]
     return [x * factor for x in t]
 
 
 def vector_sub(a: List[Numeric], b: List[Numeric]) -> List[Numeric]:
     """ Subtracts vector b from vector a. """
+    if len(a) == 2:
+        return [a[0] - b[0], a[1] - b[1]]
     return list(map(operator.sub, a, b))
 
 
 def vector_add(a: List[Numeric], b: List[Numeric]) -> List[Numeric]:
     """ Adds vector a to vector b. """
+    if len(a) == 2:
+        return [a[0] + b[0], a[1] + b[1]]
     return list(map(operator.add, a, b))
 
 
 def vector_opposite(a: List[Numeric]) -> List[Numeric]:
     """ Returns the opposite vector -a. """
+    if len(a) == 2:
+        return [-a[0], -a[1]]
     return list(map(operator.neg, a))
 
 
@@ -196,7 +224,7 @@ def inverse_axis_map(order):
 
 
 def compile_rotations(*rotations):
-    return reduce(lambda a, x: a + (x % 360) % 360, rotations, 0)
+    return sum(x % 360 for x in rotations) % 360
 
 
 def rotation_swaps_axes(rotation: int) -> bool:
@@ -216,6 +244,13 @@ def formats_to_regex(formats: Mapping) -> re.Pattern:
         itertools.chain.from_iterable([e[1] for e in formats.values()])) + r'$', re.I)
 
 
+def formats_to_extset(formats: Mapping) -> frozenset:
+    """ Returns the lowercase file extensions (without leading dot)
+    specified in C{formats}, for fast membership tests. """
+    return frozenset(e.lower() for e in
+        itertools.chain.from_iterable([e[1] for e in formats.values()]))
+
+
 def append_number_to_filename(filename: str, number: int) -> str:
     """ Generate a new string from filename with an appended number right
     before the extension. """
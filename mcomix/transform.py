@@ -4,9 +4,39 @@
 from __future__ import annotations
 
 import sys
+from functools import lru_cache
 from typing import Optional, Tuple
 
 
+# Matrices are immutable and the same few transforms are decomposed over
+# and over (e.g. for each lens redraw), so the results are cached.
+@lru_cache(maxsize=256)
+def _to_image_transforms(
+        m: Tuple[float, float, float, float]
+) -> Tuple[Tuple[float, float], int, Tuple[bool, bool]]:
+    """See Matrix.to_image_transforms."""
+    m0, m1, m2, m3 = m
+    if m1 == 0 and m2 == 0 and m0 > 0 and m3 > 0:
+        # Scaling only, the most common case.
+        return ((m0, m3), 0, (False, False))
+    swaps_axes = m0 == 0
+    s: Tuple[float, float] = (abs(m0 + m1), abs(m2 + m3))
+    r: int = 90 if swaps_axes else 0
+    f: Tuple[bool, bool] = (
+        swaps_axes ^ (m0 < 0 or m1 < 0),
+        (m2 < 0 or m3 < 0)
+    )
+    if all(f):
+        f = (False, False)
+        r += 180
+    if f[0] and r == 90:
+        # Try to avoid horizontal flips because they tend to be slow, given
+        # a certain combination of hardware, memory layout and libraries.
+        f = (False, True)
+        r = 270
+    return (s, r, f)
+
+
 class Matrix:
     """Simple linear transformations represented as a 2x2 matrix.
 
@@ -15,6 +45,8 @@ class Matrix:
     functions in the Transform class should be used to create Matrix
     objects."""
 
+    __slots__ = ('m',)
+
     def __init__(self, m1: float, m2: float, m3: float, m4: float) -> None:
         """Initialize a row-major transformation matrix."""
         self.m: Tuple[float, float, float, float] = (m1, m2, m3, m4)
@@ -28,19 +60,24 @@ class Matrix:
 
     def __bool__(self) -> bool:
         """Does this matrix perform any operations (is not identity)?"""
-        return self != Transform.ID
+        return self.m != (1, 0, 0, 1)
 
     def __add__(self, other: object) -> Matrix:
         """Combine Matrices: self + other."""
         if not isinstance(other, Matrix):
             return NotImplemented
-        a = self.m
-        b = other.m
+        # Matrices are immutable, so the identity can be skipped.
+        if self is Transform.ID:
+            return other
+        if other is Transform.ID:
+            return self
+        a0, a1, a2, a3 = self.m
+        b0, b1, b2, b3 = other.m
         return Matrix(
-            b[0] * a[0] + b[1] * a[2],
-            b[0] * a[1] + b[1] * a[3],
-            b[2] * a[0] + b[3] * a[2],
-            b[2] * a[1] + b[3] * a[3],
+            b0 * a0 + b1 * a2,
+            b0 * a1 + b1 * a3,
+            b2 * a0 + b3 * a2,
+            b2 * a1 + b3 * a3,
         )
 
     def __radd__(self, other: object) -> Matrix:
@@ -52,16 +89,13 @@ class Matrix:
     def __eq__(self, other: object) -> bool:
         """Test equality: self == other."""
         if isinstance(other, Matrix):
-            return len(self.m) == len(other.m) and all([
-                self.m[i] == other.m[i]
-                for i in range(len(self.m))
-            ])
+            return self.m == other.m
         return NotImplemented
 
     def __ne__(self, other: object) -> bool:
         """Test inequality: self != other."""
         if isinstance(other, Matrix):
-            return not self == other
+            return self.m != other.m
         return NotImplemented
 
     def and_then(self, next: Matrix) -> Matrix:
@@ -120,25 +154,13 @@ class Matrix:
         factors for the corresponding axes, r is one of (0, 90, 180, 270),
         referring to the clockwise rotation to be applied, and f is a sequence
         of bools where True refers to the corresponding axis to be flipped. """
-        s: Tuple[float, float] = (abs(self.m[0] + self.m[1]), abs(self.m[2] + self.m[3]))
-        r: int = 90 if self.swaps_axes() else 0
-        f: Tuple[bool, bool] = (
-            self.swaps_axes() ^ (self.m[0] < 0 or self.m[1] < 0),
-            (self.m[2] < 0 or self.m[3] < 0)
-        )
-        if all(f):
-            f = (False, False)
-            r += 180
-        if f[0] and r == 90:
-            # Try to avoid horizontal flips because they tend to be slow, given
-            # a certain combination of hardware, memory layout and libraries.
-            f = (False, True)
-            r = 270
-        return (s, r, f)
+        return _to_image_transforms(self.m)
 
 
 class Transform(Matrix):
 
+    __slots__ = ()
+
     ID = Matrix(1, 0, 0, 1)
     ROT90 = Matrix(0, -1, 1, 0)
     ROT180 = Matrix(-1, 0, 0, -1)
@@ -153,7 +175,11 @@ class Transform(Matrix):
         """Construct a new Matrix by calling Transform(values)."""
         return Matrix(*values)
 
+    # The conversion functions below have a small, finite input domain
+    # (rotations and flips), so their results are cached.
+
     @classmethod
+    @lru_cache(maxsize=None)
     def from_rotation(cls, deg: int) -> Matrix:
         """Get the predefined Matrix for a supported rotation."""
         if abs(deg) not in (0, 90, 180, 270):
@@ -175,6 +201,7 @@ class Transform(Matrix):
         return Matrix(s0, 0, 0, s1)
 
     @classmethod
+    @lru_cache(maxsize=None)
     def from_flips(cls, x: bool, y: bool) -> Matrix:
         """Get the predefined Matrix representing the given x and y flips."""
         if x and y:
@@ -192,10 +219,12 @@ class Transform(Matrix):
     ) -> Matrix:
         """Create a Matrix transform from a set of image transforms."""
         s, r, f = t[0:3]
-        return (
-            cls.from_scales(*s)
-            + cls.from_rotation(r)
-            + cls.from_flips(*f)
-        )
+        return cls.from_scales(*s) + cls._from_rotation_and_flips(r, *f)
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _from_rotation_and_flips(cls, deg: int, x: bool, y: bool) -> Matrix:
+        """Get the Matrix for a rotation followed by the given flips."""
+        return cls.from_rotation(deg) + cls.from_flips(x, y)
 
 # vim: expandtab:sw=4:ts=4
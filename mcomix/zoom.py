@@ -1,11 +1,8 @@
 """ Handles zoom and fit of images in the main display area. """
 
-import operator
 from mcomix import constants
 from mcomix.preferences import prefs
 from mcomix import tools
-from mcomix import box
-from functools import reduce
 from typing import List, Tuple, Sequence
 
 IDENTITY_ZOOM = 1.0
@@ -13,14 +10,21 @@ IDENTITY_ZOOM_LOG = 0
 USER_ZOOM_LOG_SCALE1 = 4.0
 MIN_USER_ZOOM_LOG = -20
 MAX_USER_ZOOM_LOG = 12
+# Scales for all user zoom levels, from MIN_USER_ZOOM_LOG to MAX_USER_ZOOM_LOG.
+_USER_SCALES = tuple(2 ** (zoom_log / USER_ZOOM_LOG_SCALE1)
+    for zoom_log in range(MIN_USER_ZOOM_LOG, MAX_USER_ZOOM_LOG + 1))
 
 
 class ZoomModel(object):
     """ Handles zoom and fit modes. """
 
+    __slots__ = ('_user_zoom_log', '_user_scale', '_fitmode', '_scale_up')
+
     def __init__(self) -> None:
         #: User zoom level.
         self._user_zoom_log = IDENTITY_ZOOM_LOG
+        #: Scale corresponding to the user zoom level.
+        self._user_scale = IDENTITY_ZOOM
         #: Image fit mode. Determines the base zoom level for an image by
         #: calculating its maximum size.
         self._fitmode = constants.ZoomMode.MANUAL
@@ -39,7 +43,12 @@ class ZoomModel(object):
         self._scale_up = scale_up
 
     def _set_user_zoom_log(self, zoom_log: int) -> None:
-        self._user_zoom_log = min(max(zoom_log, MIN_USER_ZOOM_LOG), MAX_USER_ZOOM_LOG)
+        if zoom_log < MIN_USER_ZOOM_LOG:
+            zoom_log = MIN_USER_ZOOM_LOG
+        elif zoom_log > MAX_USER_ZOOM_LOG:
+            zoom_log = MAX_USER_ZOOM_LOG
+        self._user_zoom_log = zoom_log
+        self._user_scale = _USER_SCALES[zoom_log - MIN_USER_ZOOM_LOG]
 
     def zoom_in(self) -> None:
         self._set_user_zoom_log(self._user_zoom_log + 1)
@@ -54,29 +63,34 @@ class ZoomModel(object):
                         distribution_axis: constants.PageAxis, do_not_transform: List[bool], prefer_same_size: bool,
                         fit_same_size: bool) -> Tuple[int, int]:
         scale_up = self._scale_up
+        if self._fitmode == constants.ZoomMode.MANUAL and not scale_up and \
+            self._user_zoom_log == IDENTITY_ZOOM_LOG and not prefer_same_size:
+            # Nothing limits the size and nothing scales the images, so they are
+            # shown at their original sizes.
+            return ([_round_nonempty(s) for s in image_sizes], [False] * len(image_sizes))
         if prefer_same_size:
             # Preprocessing step: scale all images to the same size
-            image_boxes = [box.Box(s) for s in image_sizes]
             # Scale up to the same size if this is allowed, otherwise scale down.
+            # As all images are at the origin, their union (intersection) is
+            # the maximum (minimum) size along each axis.
             if scale_up:
                 # Scale up to union.
-                pre_limits = box.Box.bounding_box(image_boxes).get_size()
+                pre_limits = list(map(max, zip(*image_sizes)))
             else:
                 # Scale down to intersection.
-                pre_limits = reduce(box.Box.intersect, image_boxes, image_boxes[0]).get_size()
-            new_image_sizes = [tuple(tools.scale(s, ZoomModel._preferred_scale(
-                s, pre_limits, distribution_axis))) for s in image_sizes]
-            new_image_sizes2 = [new_image_sizes[i] if not do_not_transform[i] else image_sizes[i]
-                                for i in range(len(new_image_sizes))]
-            image_sizes = new_image_sizes2
+                pre_limits = list(map(min, zip(*image_sizes)))
+            image_sizes = [s if dnt else tools.scale(s, ZoomModel._preferred_scale(
+                s, pre_limits, distribution_axis))
+                for s, dnt in zip(image_sizes, do_not_transform)]
         union_size = _union_size(image_sizes, distribution_axis)
         limits = ZoomModel._calc_limits(union_size, screen_size, self._fitmode,
                                         scale_up)
         prefscale = ZoomModel._preferred_scale(union_size, limits, distribution_axis)
-        preferred_scales = tuple([prefscale if not dnt else IDENTITY_ZOOM for dnt in do_not_transform])
-        prescaled = list(map(lambda size, scale, dnt: tuple(_scale_image_size(size, scale)),
-                         image_sizes, preferred_scales, do_not_transform))
-        prescaled_union_size = _union_size(prescaled, distribution_axis)
+        preferred_scales = [IDENTITY_ZOOM if dnt else prefscale for dnt in do_not_transform]
+        # Only the total size along distribution_axis is needed from the
+        # prescaled images.
+        prescaled_axis_size = sum([_round_nonempty((size[distribution_axis] * scale,))[0]
+                                   for size, scale in zip(image_sizes, preferred_scales)])
 
         def _other_preferences(limits: Sequence[int], distribution_axis: constants.PageAxis) -> bool:
             for i in range(len(limits)):
@@ -87,7 +101,7 @@ class ZoomModel(object):
             return False
         other_preferences = _other_preferences(limits, distribution_axis)
         if limits[distribution_axis] is not None and \
-            (prescaled_union_size[distribution_axis] > screen_size[distribution_axis]
+            (prescaled_axis_size > screen_size[distribution_axis]
             or not other_preferences):
             distributed_scales = ZoomModel._scale_distributed(image_sizes,
                 distribution_axis, limits[distribution_axis], scale_up, do_not_transform)
@@ -95,13 +109,14 @@ class ZoomModel(object):
                 preferred_scales = list(map(min, preferred_scales, distributed_scales))
             else:
                 preferred_scales = distributed_scales
-        if not scale_up:
-            preferred_scales = [min(x, IDENTITY_ZOOM) for x in preferred_scales]
-        user_scale = 2 ** (self._user_zoom_log / USER_ZOOM_LOG_SCALE1)
-        res_scales = [preferred_scales[i] * (user_scale if not do_not_transform[i] else IDENTITY_ZOOM)
-            for i in range(len(preferred_scales))]
-        res = list(map(lambda size, scale: list(_scale_image_size(size, scale)),
-            image_sizes, res_scales))
+        user_scale = self._user_scale
+        res = []
+        for size, scale, dnt in zip(image_sizes, preferred_scales, do_not_transform):
+            if not scale_up:
+                scale = min(scale, IDENTITY_ZOOM)
+            if not dnt:
+                scale *= user_scale
+            res.append(_scale_image_size(size, scale))
         distorted = [False] * len(res)
         if prefer_same_size and fit_same_size:
             # While the algorithm so far tries hard to keep the aspect ratios of the
@@ -111,20 +126,13 @@ class ZoomModel(object):
             # Simple approach: For each dimension, we fit each image to either the
             # minimum size (if scale_up is false) or maximum size (if scale_up is true)
             # of all images, given the scaled sizes computed so far.
-            op = operator.gt if scale_up else operator.lt
-            exs = [None] * len(limits)
-            for d in range(len(limits)):
-                if d == distribution_axis:
-                    continue
-                for i in res:
-                    if exs[d] is None or op(i[d], exs[d]):
-                        exs[d] = i[d]
-            for d in range(len(limits)):
-                if d == distribution_axis:
+            exs = list(map(max if scale_up else min, zip(*res)))
+            for i, size in enumerate(res):
+                if do_not_transform[i]:
                     continue
-                for i in range(len(res)):
-                    if (res[i][d] != exs[d]) and not do_not_transform[i]:
-                        res[i][d] = exs[d]
+                for d, ex in enumerate(exs):
+                    if d != distribution_axis and size[d] != ex:
+                        size[d] = ex
                         distorted[i] = True
         return (res, distorted)
 
@@ -133,6 +141,13 @@ class ZoomModel(object):
         """ Returns scale that makes an image of size image_size respect the
         limits imposed by limits. If no proper value can be determined,
         IDENTITY_ZOOM is returned. """
+        if len(limits) == 2:
+            # Only the other axis can impose a limit.
+            other_axis = 1 - distribution_axis
+            l = limits[other_axis]
+            if l is None:
+                return IDENTITY_ZOOM
+            return tools.div(l, image_size[other_axis])
         min_scale = None
         for i in range(len(limits)):
             if i == distribution_axis:
@@ -198,12 +213,14 @@ class ZoomModel(object):
         # trivial cases first
         if n == 0:
             return []
+        # The box sizes along axis, which most of the computations need.
+        axis_sizes = [s[axis] for s in sizes]
         if n >= max_size:
             # In this case, only one solution or only an approximation is available.
             # if n > max_size, the result won't fit into max_size.
-            return [IDENTITY_ZOOM if dnt else tools.div(1, s[axis]) for s, dnt in zip(sizes, do_not_transform)]
-        total_axis_size = sum([s[axis] for s in sizes])
-        total_dnt_axis_size = sum([s[axis] for s, dnt in zip(sizes, do_not_transform) if dnt])
+            return [IDENTITY_ZOOM if dnt else tools.div(1, s) for s, dnt in zip(axis_sizes, do_not_transform)]
+        total_axis_size = sum(axis_sizes)
+        total_dnt_axis_size = sum([s for s, dnt in zip(axis_sizes, do_not_transform) if dnt])
         if ((total_axis_size <= max_size) and not allow_upscaling) or \
             (total_axis_size == total_dnt_axis_size):
             # identity
@@ -212,16 +229,30 @@ class ZoomModel(object):
         # non-trival case
         # initial guess
         scale = tools.div(max_size - total_dnt_axis_size, total_axis_size - total_dnt_axis_size)
-        scaling_data = [None] * n
+        if not any(do_not_transform) and sizes.count(sizes[0]) == n:
+            # All boxes are equal, so they are all scaled the same way: to the
+            # rounded initial guess, or one less if that does not fit.
+            this_axis_size = axis_sizes[0]
+            approx = _round_nonempty((this_axis_size * scale,))[0]
+            if approx * n > max_size and approx > 1:
+                approx -= 1
+            return [tools.div(approx, this_axis_size)] * n
+        # One list per field: the scale so far, the ideal (unrounded) size,
+        # whether the box can still be made smaller along axis, and the scale
+        # and relative volume error of doing so.
+        local_scales = [IDENTITY_ZOOM] * n
+        ideals = [IDENTITY_ZOOM] * n
+        can_be_downscaled = [False] * n
+        forced_scales = [IDENTITY_ZOOM] * n
+        forced_vol_errs = [0.0] * n
         total_axis_size = 0
         # This loop collects some data we need for the actual computations later.
         for i in range(n):
             this_size = sizes[i]
+            this_axis_size = axis_sizes[i]
             # Shortcut: If the size cannot be changed, accept the original size.
             if do_not_transform[i]:
-                total_axis_size += this_size[axis]
-                scaling_data[i] = [IDENTITY_ZOOM, IDENTITY_ZOOM, False,
-                    IDENTITY_ZOOM, 0.0]
+                total_axis_size += this_axis_size
                 continue
             # Initial guess: The current scale works for all tuples.
             ideal = tools.scale(this_size, scale)
@@ -232,65 +263,57 @@ class ZoomModel(object):
             # dimensions are monotonically scaled (with respect to local_scale).
             # A nice side effect of this is that it keeps the aspect ratio better.
             dummy_approx = _round_nonempty((ideal[axis],))[0]
-            local_scale = tools.div(dummy_approx, this_size[axis])
+            local_scales[i] = tools.div(dummy_approx, this_axis_size)
+            ideals[i] = ideal
             total_axis_size += dummy_approx
-            can_be_downscaled = dummy_approx > 1
-            if can_be_downscaled:
+            if dummy_approx > 1:
+                can_be_downscaled[i] = True
                 forced_size = dummy_approx - 1
-                forced_scale = tools.div(forced_size, this_size[axis])
+                forced_scale = tools.div(forced_size, this_axis_size)
                 forced_approx = _scale_image_size(this_size, forced_scale)
-                forced_vol_err = tools.relerr(tools.volume(forced_approx), ideal_vol)
-            else:
-                forced_scale = None
-                forced_vol_err = None
-            scaling_data[i] = [local_scale, ideal, can_be_downscaled,
-                forced_scale, forced_vol_err]
+                forced_scales[i] = forced_scale
+                forced_vol_errs[i] = tools.relerr(tools.volume(forced_approx), ideal_vol)
+        if total_axis_size <= max_size:
+            return local_scales
         # Now we need to find at most total_axis_size - max_size occasions to
         # scale down some tuples so the whole thing would fit into max_size. If
         # we are lucky, there will be no gaps at the end (or at least fewer gaps
         # than we would have if we always rounded down).
-        dirty=True # This flag prevents infinite loops if nothing can be made any smaller.
-        while dirty and (total_axis_size > max_size):
-            # This algorithm needs O(n*n) time. Let's hope that n is small enough.
-            dirty=False
-            current_index = 0
-            current_min = None
-            for i in range(n):
-                d = scaling_data[i]
-                if not d[2]:
-                    # Ignore elements that cannot be made any smaller.
-                    continue
-                if (current_min is None) or (d[4] < current_min[4]):
-                    # We are searching for the tuple where downscaling results
-                    # in the smallest relative volume error (compared to the
-                    # respective ideal volume).
-                    current_min = d
-                    current_index = i
-            for i in range(current_index, n):
-                # We must scale down ALL equal tuples. Otherwise, images that
-                # are of equal size might appear to be of different size
-                # afterwards. The downside of this approach is that it might
-                # introduce more gaps than necessary.
-                d = scaling_data[i]
-                if (not d[2]) or (d[1] != current_min[1]):
-                    continue
-                d[0] = d[3]
-                d[2] = False # only once per tuple
-                total_axis_size -= 1
-                dirty=True
-        else:
-            # If we are here and total_axis_size < max_size, we could try to
-            # upscale some tuples similarly to the other loop (i.e. smallest
-            # relative volume error first, equal boxes in conjunction with each
-            # other). However, this is not as useful as the other loop, slightly
-            # more complicated and it won't do anything if all tuples are equal.
-            pass
-        return [d[0] for d in scaling_data]
+        # We must scale down ALL equal tuples. Otherwise, images that are of
+        # equal size might appear to be of different size afterwards. The
+        # downside of this approach is that it might introduce more gaps than
+        # necessary. So group equal tuples first; each group can be scaled
+        # down only once.
+        groups = {}
+        for i in range(n):
+            if can_be_downscaled[i]:
+                groups.setdefault(tuple(ideals[i]), []).append(i)
+        # Scale down the groups where downscaling results in the smallest
+        # relative volume error (compared to the respective ideal volume)
+        # first, the first group first in case of a tie.
+        for group in sorted(groups.values(),
+                            key=lambda group: (forced_vol_errs[group[0]], group[0])):
+            if total_axis_size <= max_size:
+                break
+            for i in group:
+                local_scales[i] = forced_scales[i]
+            total_axis_size -= len(group)
+        # If we are here and total_axis_size < max_size, we could try to
+        # upscale some tuples similarly to the loop above (i.e. smallest
+        # relative volume error first, equal boxes in conjunction with each
+        # other). However, this is not as useful as downscaling, slightly
+        # more complicated and it won't do anything if all tuples are equal.
+        return local_scales
 
 def _scale_image_size(size, scale):
+    if len(size) == 2:
+        return [max(int(round(size[0] * scale)), 1),
+                max(int(round(size[1] * scale)), 1)]
     return _round_nonempty(tools.scale(size, scale))
 
 def _round_nonempty(t):
+    if len(t) == 2:
+        return [max(int(round(t[0])), 1), max(int(round(t[1])), 1)]
     result = [0] * len(t)
     for i in range(len(t)):
         x = int(round(t[i]))
@@ -300,8 +323,8 @@ def _round_nonempty(t):
 def _union_size(image_sizes, distribution_axis):
     if len(image_sizes) == 0:
         return []
-    n = len(image_sizes[0])
-    union_size = [reduce(max, [x[i] for x in image_sizes]) for i in range(n)]
+    # Transposing the sizes with zip() gives one tuple per axis.
+    union_size = list(map(max, zip(*image_sizes)))
     union_size[distribution_axis] = sum([x[distribution_axis] for x in image_sizes])
     return union_size
 
@@ -0,0 +1,66 @@
+import io
+import os
+import tempfile
+import unittest
+
+try:
+    import fitz
+    from PIL import Image
+    from mcomix.archive.native_pdf.child import FitzWorker, XREF_DELIMITER
+    from mcomix.preferences import prefs
+except ImportError:
+    fitz = None
+
+
+@unittest.skipIf(fitz is None, 'PyMuPDF and Pillow are required')
+class RotatedPageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        auto_rotate = prefs['auto rotate from exif']
+        self.addCleanup(prefs.__setitem__, 'auto rotate from exif', auto_rotate)
+        prefs['auto rotate from exif'] = True
+
+    def _make_pdf(self, rotation):
+        """Write a PDF with a single page holding a full-page 40x20
+        JPEG, rotated by <rotation> degrees, and return its path."""
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 20), 'red').save(buffer, format='JPEG')
+        doc = fitz.open()
+        page = doc.new_page(width=40, height=20)
+        page.insert_image(page.rect, stream=buffer.getvalue())
+        page.set_rotation(rotation)
+        path = os.path.join(self.tmpdir.name, 'rotated.pdf')
+        doc.save(path)
+        doc.close()
+        return path
+
+    def _extract(self, rotation):
+        worker = FitzWorker(self._make_pdf(rotation))
+        filenames = list(worker.iter_contents())
+        self.assertEqual(len(filenames), 1)
+        self.assertIn(XREF_DELIMITER, filenames[0])
+        dest = os.path.join(self.tmpdir.name, 'out')
+        worker.extract_file(filenames[0], dest)
+        with Image.open(os.path.join(dest, filenames[0])) as img:
+            return img.size
+
+    def test_unrotated_page(self):
+        self.assertEqual(self._extract(0), (40, 20))
+
+    def test_rotated_page(self):
+        # With auto rotation, the page rotation is applied to the pixels,
+        # so that loaders ignoring metadata (thumbnails, library covers)
+        # show the page rotated as well.
+        self.assertEqual(self._extract(90), (20, 40))
+        self.assertEqual(self._extract(180), (40, 20))
+        self.assertEqual(self._extract(270), (20, 40))
+
+    def test_rotated_page_without_auto_rotate(self):
+        prefs['auto rotate from exif'] = False
+        self.assertEqual(self._extract(90), (40, 20))
+
+
+if __name__ == '__main__':
+    unittest.main()
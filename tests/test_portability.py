@@ -0,0 +1,39 @@
+import unittest
+
+from mcomix.portability import normalize_uri
+
+
+class NormalizeUriTest(unittest.TestCase):
+
+    def test_file_uris(self):
+        for uri, path in (
+            # Correctly formatted.
+            ('file://localhost/home/user/book.cbz', '/home/user/book.cbz'),
+            # Nautilus etc.
+            ('file:///home/user/book.cbz', '/home/user/book.cbz'),
+            # Xffm etc.
+            ('file:/home/user/book.cbz', '/home/user/book.cbz'),
+            # Only the prefix is stripped.
+            ('file:////server/book.cbz', '//server/book.cbz'),
+            ('file:///home/file:/book.cbz', '/home/file:/book.cbz'),
+            ('file://host/book.cbz', '//host/book.cbz'),
+        ):
+            with self.subTest(uri=uri):
+                self.assertEqual(normalize_uri(uri), path)
+
+    def test_other_uris_unchanged(self):
+        for uri in (
+            '/home/user/book.cbz',
+            'book.cbz',
+            'http://example.com/book.cbz',
+            'smb://server/share/book.cbz',
+            'file:book.cbz',
+            'FILE:///home/user/book.cbz',
+            '',
+        ):
+            with self.subTest(uri=uri):
+                self.assertEqual(normalize_uri(uri), uri)
+
+
+if __name__ == '__main__':
+    unittest.main()